@@ -5,11 +5,19 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
+from services.token_service import token_revocation_service, prune_revoked_tokens_command
+from services.forecast_service import forecast_demand_command
+from services.recommendation_service import build_recommendations_command
+from services.popularity_service import reconcile_product_counters_command
+from services.ticket_search_service import reindex_tickets_command
 import os
 
 # Import SQLAlchemy db instance
 from models_sqlalchemy import db
+from models_sqlalchemy.engine import configure_engine_options, init_engine, create_replica_engines
+from models_sqlalchemy.routing import init_replicas
 from models_sqlalchemy.user import User
 from models_sqlalchemy.models import (
     ProviderProfile, Product, Order, OrderItem,
@@ -21,6 +29,13 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # Take the client address from trusted proxies' X-Forwarded-* headers
+    proxy_count = app.config['TRUSTED_PROXY_COUNT']
+    if proxy_count:
+        app.wsgi_app = ProxyFix(
+            app.wsgi_app, x_for=proxy_count, x_proto=proxy_count, x_host=proxy_count
+        )
+    
     # Initialize extensions
     # Configure CORS with explicit settings
     CORS(app, 
@@ -30,7 +45,10 @@ def create_app(config_class=Config):
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
     
     # Initialize SQLAlchemy
+    configure_engine_options(app)
     db.init_app(app)
+    init_engine(app, db)
+    init_replicas(app, create_replica_engines(app))
     
     # Initialize Flask-Migrate
     migrate = Migrate(app, db)
@@ -38,6 +56,13 @@ def create_app(config_class=Config):
     # Initialize JWT
     jwt = JWTManager(app)
     
+    # CLI commands (run from cron)
+    app.cli.add_command(forecast_demand_command)
+    app.cli.add_command(build_recommendations_command)
+    app.cli.add_command(reconcile_product_counters_command)
+    app.cli.add_command(reindex_tickets_command)
+    app.cli.add_command(prune_revoked_tokens_command)
+    
     # Ensure upload folder exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
@@ -47,12 +72,14 @@ def create_app(config_class=Config):
     from routes.admin import admin_bp
     from routes.customer import customer_bp
     from routes.mpesa_routes import mpesa_bp
+    from routes.media import media_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(provider_bp, url_prefix='/api/provider')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
     app.register_blueprint(customer_bp, url_prefix='/api/customer')
     app.register_blueprint(mpesa_bp, url_prefix='/api/mpesa')
+    app.register_blueprint(media_bp, url_prefix=app.config['MEDIA_URL_PREFIX'])
     
     # Health check endpoint
     @app.route('/api/health')
@@ -79,6 +106,17 @@ def create_app(config_class=Config):
             'message': 'Please provide a valid authentication token'
         }), 401
     
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return token_revocation_service.is_revoked(jwt_payload['jti'])
+    
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return jsonify({
+            'error': 'Token has been revoked',
+            'message': 'Please log in again'
+        }), 401
+    
     @jwt.unauthorized_loader
     def missing_token_callback(error):
         return jsonify({
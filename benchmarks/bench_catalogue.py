@@ -0,0 +1,133 @@
+"""
+Benchmark storefront browse on the SQL engine against the in-memory
+columnar catalogue (CATALOGUE_ENGINE=memory)
+
+Seeds a temporary SQLite catalogue, reports the snapshot's memory
+footprint and runs a mix of filter/sort/search queries through the browse
+endpoint on each engine, reporting queries per second.
+
+Usage: python benchmarks/bench_catalogue.py [--products 10000] [--seconds 5]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from config import Config
+from models_sqlalchemy import db
+from models_sqlalchemy.user import User
+from models_sqlalchemy.models import Product, ProviderProfile
+from services.catalogue_service import catalogue_engine
+
+QUERIES = [
+    'facets=false',
+    'max_price=5000&sort=price_asc&facets=false',
+    'search=lantern&facets=false',
+    'min_wattage=20&max_wattage=100&sort=wattage',
+    'panel_type=Monocrystalline&in_stock=true&sort=newest',
+    'search=camping&min_price=1000'
+]
+
+def build_app(products):
+    folder = tempfile.mkdtemp(prefix='catalogue-bench-')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(folder, 'bench.db')
+        UPLOAD_FOLDER = folder
+        RATE_LIMIT_ENABLED = False
+        CATALOGUE_FACET_CACHE_SECONDS = 0
+
+    app = create_app(BenchConfig)
+    rng = random.Random(0)
+    with app.app_context():
+        db.create_all()
+        customer = User(email='customer@example.com', role='customer', full_name='Bench', password_hash='x')
+        db.session.add(customer)
+        providers = [
+            User(email=f'provider{i}@example.com', role='provider', full_name=f'Provider {i}', password_hash='x')
+            for i in range(50)
+        ]
+        db.session.add_all(providers)
+        db.session.flush()
+        db.session.add_all([
+            ProviderProfile(user_id=p.id, business_name=f'Solar Co {i}', is_approved=True)
+            for i, p in enumerate(providers)
+        ])
+        db.session.add_all([
+            Product(
+                provider_id=rng.choice(providers).id,
+                name=f"{rng.choice(['Solar', 'Bright', 'Eco', 'Sun'])} {rng.choice(['Lantern', 'Lamp', 'Kit', 'Floodlight'])} {i}",
+                description=rng.choice(['Camping light with USB charging', 'Home lighting kit', 'Portable lantern']),
+                price=rng.choice([450, 800, 1200, 2800, 3500, 5500, 18500, 25000]) + i % 100,
+                wattage=rng.choice([None, 5, 10, 15, 25, 40, 60, 100, 200]),
+                battery_capacity=rng.choice([None, '2000mAh', '8000mAh', '40000mAh']),
+                solar_panel_type=rng.choice(['Monocrystalline', 'Polycrystalline', 'Amorphous']),
+                lighting_duration=rng.choice(['6-8 hours', '12 hours', 'N/A']),
+                stock_quantity=rng.choice([0, 5, 50]),
+                is_active=True, is_approved=True
+            )
+            for i in range(products)
+        ])
+        db.session.commit()
+        token = create_access_token(identity=customer.id)
+    return app, token
+
+def measure_snapshot(app):
+    with app.app_context():
+        tracemalloc.start()
+        started = time.perf_counter()
+        catalogue_engine._snapshot = None
+        app.config['CATALOGUE_ENGINE'] = 'memory'
+        snapshot = catalogue_engine.snapshot()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    columns = sum(getattr(snapshot, name).nbytes for name in
+                  ('ids', 'price', 'wattage', 'stock', 'units_sold', 'provider_id', 'panel_type',
+                  'created_at'))
+    payloads = sum(len(p) for p in snapshot.payloads)
+    text = len(snapshot.blob.encode())
+    print(f"snapshot of {len(snapshot)} products built in {elapsed:.2f}s")
+    print(f"  numeric/panel columns {columns / 1024:10.0f} KiB")
+    print(f"  search text           {text / 1024:10.0f} KiB")
+    print(f"  encoded payloads      {payloads / 1024:10.0f} KiB")
+    print(f"  tracemalloc peak      {peak / 1024:10.0f} KiB")
+
+def run(app, token, engine, seconds):
+    app.config['CATALOGUE_ENGINE'] = engine
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    count = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        response = client.get('/api/customer/products?' + QUERIES[count % len(QUERIES)], headers=headers)
+        assert response.status_code == 200, response.data[:200]
+        count += 1
+    elapsed = time.perf_counter() - started
+    print(f"  {engine:<8}{count / elapsed:10.1f} req/s  ({count} requests)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    app, token = build_app(args.products)
+    measure_snapshot(app)
+
+    print(f"browse throughput, {len(QUERIES)}-query mix:")
+    for engine in ('sql', 'memory'):
+        run(app, token, engine, args.seconds)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark concurrent product image fetches through the media route
+
+Starts the app on a local threaded server, stores a set of images in a
+temporary UPLOAD_FOLDER and fetches them from many client threads.
+
+Usage: python benchmarks/bench_media.py [--clients 32] [--requests 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import Config
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+def build_images(folder, count, size):
+    """Write `count` content-hashed files of `size` bytes"""
+    import hashlib
+    names = []
+    for i in range(count):
+        data = os.urandom(size)
+        name = f"{hashlib.sha256(data).hexdigest()}_medium.webp"
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(data)
+        names.append(name)
+    return names
+
+def run(base_url, names, clients, total, headers_for):
+    """Fetch `total` images from `clients` threads; returns (seconds, bytes)"""
+    local = threading.local()
+
+    def fetch(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        name = names[i % len(names)]
+        response = session.get(f"{base_url}/{name}", headers=headers_for(name))
+        return len(response.content)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        transferred = sum(pool.map(fetch, range(total)))
+    return time.perf_counter() - start, transferred
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--images', type=int, default=50)
+    parser.add_argument('--size', type=int, default=80 * 1024)
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='media-bench-')
+
+    class BenchConfig(Config):
+        UPLOAD_FOLDER = folder
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+    app = create_app(BenchConfig)
+    names = build_images(folder, args.images, args.size)
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}{Config.MEDIA_URL_PREFIX}"
+
+    scenarios = [
+        ('full body', lambda name: {}),
+        ('range 0-16KB', lambda name: {'Range': 'bytes=0-16383'}),
+        ('revalidate (304)', lambda name: {'If-None-Match': f'"{name[:64]}"'}),
+    ]
+
+    print(f"{args.requests} requests, {args.clients} clients, "
+          f"{args.images} images of {args.size // 1024} KB")
+    for label, headers_for in scenarios:
+        elapsed, transferred = run(base_url, names, args.clients, args.requests, headers_for)
+        print(f"  {label:<18} {args.requests / elapsed:8.0f} req/s "
+              f"{transferred / elapsed / 1024 / 1024:8.1f} MB/s")
+
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
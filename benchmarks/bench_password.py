@@ -0,0 +1,75 @@
+"""
+Benchmark login password verification throughput
+
+Reports verifications per second on one core (in the request thread) for
+several hash parameter sets, then through the PasswordService pool.
+
+Usage: python benchmarks/bench_password.py [--seconds 3] [--workers 2] [--threads 16]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from config import Config
+from services.password_service import PasswordService
+
+METHODS = ['scrypt:32768:8:1', 'scrypt:16384:8:1', 'pbkdf2:sha256:600000', 'pbkdf2:sha256:260000']
+
+def per_core(method, seconds):
+    pwhash = generate_password_hash('Correct-Horse-1', method)
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        check_password_hash(pwhash, 'Correct-Horse-1')
+        count += 1
+    return count / seconds
+
+def pooled(method, seconds, workers, threads):
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(PASSWORD_HASH_METHOD=method, PASSWORD_HASH_WORKERS=workers,
+                      PASSWORD_HASH_MAX_PENDING=threads)
+    service = PasswordService()
+    pwhash = generate_password_hash('Correct-Horse-1', method)
+    deadline = time.perf_counter() + seconds
+
+    def login_loop(_):
+        count = 0
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                service.verify(pwhash, 'Correct-Horse-1')
+                count += 1
+        return count
+
+    with app.app_context():
+        service.verify(pwhash, 'Correct-Horse-1')  # start the pool
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(login_loop, range(threads)))
+    return total / seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--workers', type=int, default=Config.PASSWORD_HASH_WORKERS)
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores available")
+    for method in METHODS:
+        print(f"  {method:<22} {per_core(method, args.seconds):8.1f} logins/s per core")
+
+    method = Config.PASSWORD_HASH_METHOD
+    rate = pooled(method, args.seconds, args.workers, args.threads)
+    print(f"  pool: {method}, {args.workers} workers, {args.threads} request threads: "
+          f"{rate:.1f} logins/s ({rate / args.workers:.1f} per worker core)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark a full frequently-bought-together rebuild
+
+Generates synthetic order lines with a skewed product popularity, then
+times each stage RecommendationService.rebuild runs after loading the
+lines: pair expansion, pair counting and top-K selection.
+
+Usage: python benchmarks/bench_recommendations.py [--orders 1000000] [--products 20000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.recommendation_service import aggregate_pairs, order_pairs, top_neighbours
+
+def synthetic_lines(orders, products, mean_items, rng):
+    sizes = rng.poisson(mean_items - 1, orders) + 1
+    order_ids = np.repeat(np.arange(1, orders + 1), sizes)
+    # Zipf-like popularity: a few lanterns appear in most baskets
+    product_ids = np.minimum(rng.zipf(1.3, len(order_ids)), products)
+    return order_ids, product_ids
+
+def timed(label, fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    print(f"  {label:<22}{time.perf_counter() - started:8.3f}s")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--orders', type=int, default=1000000)
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--items', type=float, default=3.0, help='mean lines per order')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--max-order-items', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    order_ids, product_ids = synthetic_lines(args.orders, args.products, args.items, rng)
+    print(f"{args.orders} orders, {len(order_ids)} lines, {args.products} products")
+
+    started = time.perf_counter()
+    left, right = timed('pair expansion', order_pairs, order_ids, product_ids, args.max_order_items)
+    pairs = timed('pair counting', aggregate_pairs, left, right)
+    neighbours = timed('top-k selection', top_neighbours, *pairs, args.top)
+    total = time.perf_counter() - started
+
+    print(f"  {'total':<22}{total:8.3f}s")
+    print(f"{len(left)} pairs, {len(pairs[0])} distinct, {len(neighbours[0])} neighbour rows stored")
+
+if __name__ == '__main__':
+    main()
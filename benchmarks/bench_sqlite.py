@@ -0,0 +1,102 @@
+"""
+Benchmark concurrent SQLite writers and readers with and without the
+production pragma profile (Config.SQLITE_PRAGMAS)
+
+Writers insert cart lines one transaction at a time while readers run the
+storefront product query; throughput and lock errors are reported.
+
+Usage: python benchmarks/bench_sqlite.py [--writers 4] [--readers 8] [--seconds 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import Config
+from models_sqlalchemy import db
+from models_sqlalchemy.user import User
+from models_sqlalchemy.models import CartItem, Product
+
+def build_app(pragmas):
+    folder = tempfile.mkdtemp(prefix='sqlite-bench-')
+    uri = 'sqlite:///' + os.path.join(folder, 'bench.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+        SQLITE_PRAGMAS = pragmas
+        UPLOAD_FOLDER = folder
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(email='bench@example.com', role='customer', full_name='Bench', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all([
+            Product(provider_id=user.id, name=f'Lantern {i}', price=500 + i, wattage=i % 100,
+                    stock_quantity=100, is_active=True, is_approved=True)
+            for i in range(2000)
+        ])
+        db.session.commit()
+    return app
+
+def run(app, writers, readers, seconds):
+    counts = {'writes': 0, 'reads': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer():
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                try:
+                    db.session.add(CartItem(customer_id=1, product_id=1, quantity=1))
+                    db.session.commit()
+                    bump('writes')
+                except Exception:
+                    db.session.rollback()
+                    bump('errors')
+
+    def reader():
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                try:
+                    Product.query.filter_by(is_active=True, is_approved=True)\
+                        .filter(Product.price <= 1500).limit(50).all()
+                    db.session.rollback()
+                    bump('reads')
+                except Exception:
+                    db.session.rollback()
+                    bump('errors')
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds}s each")
+    for label, pragmas in [('default (rollback journal)', {}), ('tuned (Config.SQLITE_PRAGMAS)', Config.SQLITE_PRAGMAS)]:
+        counts = run(build_app(pragmas), args.writers, args.readers, args.seconds)
+        print(f"  {label:<30} {counts['writes'] / args.seconds:8.0f} writes/s "
+              f"{counts['reads'] / args.seconds:8.0f} reads/s {counts['errors']:6d} errors")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Stress test the order/ticket number allocator across processes
+
+Each worker process leases its node id from a shared SQLite database,
+as gunicorn workers would; the parent checks that the leased node ids
+are distinct, that every id is unique and that each worker's sequence is
+strictly increasing.
+
+Usage: python benchmarks/stress_number_allocator.py [--processes 8] [--count 250000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import Config
+from models_sqlalchemy import db
+from services.number_service import NumberAllocator, decode, encode
+
+def build_app(folder):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(folder, 'bench.db')
+        UPLOAD_FOLDER = folder
+
+    return create_app(BenchConfig)
+
+def generate(args):
+    folder, count = args
+    app = build_app(folder)
+    with app.app_context():
+        allocator = NumberAllocator()
+        start = time.perf_counter()
+        numbers = [allocator.next_number('ORD') for _ in range(count)]
+        elapsed = time.perf_counter() - start
+        node_id = allocator._node_id
+        db.engine.dispose()
+    return node_id, numbers, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--count', type=int, default=250000)
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='number-bench-')
+    with build_app(folder).app_context():
+        db.create_all()
+        db.engine.dispose()
+
+    start = time.perf_counter()
+    with Pool(args.processes) as pool:
+        results = pool.map(generate, [(folder, args.count)] * args.processes)
+    elapsed = time.perf_counter() - start
+
+    node_ids = [node_id for node_id, _, _ in results]
+    assert len(set(node_ids)) == args.processes, f'node ids leased twice: {sorted(node_ids)}'
+
+    seen = set()
+    for _, numbers, _ in results:
+        values = [decode(number[4:]) for number in numbers]
+        assert all(a < b for a, b in zip(values, values[1:])), 'sequence not monotonic'
+        assert numbers == sorted(numbers), 'string order differs from numeric order'
+        assert all(encode(v) == n[4:] for v, n in zip(values[:1000], numbers)), 'round trip failed'
+        seen.update(values)
+
+    total = args.processes * args.count
+    assert len(seen) == total, f'{total - len(seen)} collisions'
+
+    per_process = max(seconds for _, _, seconds in results)
+    print(f"{total} ids from {args.processes} processes (node ids {sorted(node_ids)}): "
+          f"no collisions, monotonic per process")
+    print(f"  {args.count / per_process:,.0f} ids/s per process, {elapsed:.1f}s wall incl. checks")
+
+if __name__ == '__main__':
+    main()
@@ -15,28 +15,172 @@ class Config:
     # Database settings
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///database.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Pool/driver options are derived per backend from the URI in
+    # create_app; anything set here overrides the derived values
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    
+    # Read replicas for @read_replica views (comma-separated URIs)
+    SQLALCHEMY_REPLICA_URIS = [
+        uri.strip() for uri in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()
+    ]
+    READ_YOUR_WRITES_SECONDS = 10  # keep a writer on the primary this long
+    
+    # Applied to every new SQLite connection (ignored on other backends)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,  # ms
+        'cache_size': -64000,  # KiB, i.e. 64MB
+        'mmap_size': 268435456,  # 256MB
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON'
+    }
     
     # JWT settings
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     
+    # Token revocation (logout, refresh rotation)
+    TOKEN_REVOCATION_SYNC_SECONDS = 5  # how stale another worker's revocation may be
+    TOKEN_REVOCATION_LOOKBACK_SECONDS = 30  # allowance for revocations committed out of revoked_at order
+    TOKEN_REVOCATION_CAPACITY = 100000  # Bloom filter size before it is rebuilt larger
+    
+    # Reverse proxies in front of the app whose X-Forwarded-For/-Proto/-Host
+    # headers are trusted (0 when clients connect directly). The client IP
+    # used for rate limiting comes from the hop this many proxies back.
+    TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
+    
     # CORS settings
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173').split(',')
     
     # File upload settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = 'uploads'
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+    MEDIA_URL_PREFIX = '/api/media'
+    MEDIA_MAX_AGE = 3600  # seconds, for names that are not content-hashed
+    
+    # Let a front proxy serve media bytes: USE_X_SENDFILE for Apache/lighttpd,
+    # or an nginx internal location mapped onto UPLOAD_FOLDER for X-Accel-Redirect
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
+    MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '')
+    
+    # Product image variants (name -> max width/height, None keeps full size)
+    IMAGE_VARIANT_SIZES = {
+        'thumb': (200, 200),
+        'medium': (800, 800),
+        'full': None
+    }
+    IMAGE_WEBP_QUALITY = 80
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', '2'))
     
     # Pagination
     PRODUCTS_PER_PAGE = 12
     ORDERS_PER_PAGE = 10
     TICKETS_PER_PAGE = 10
     
+    # Password hashing (werkzeug method string, e.g. scrypt:32768:8:1 or
+    # pbkdf2:sha256:600000); hashes made with other parameters are upgraded
+    # on the next successful login
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))  # 0 hashes in the request thread
+    PASSWORD_HASH_NICE = 10  # scheduler priority drop for hash workers
+    PASSWORD_HASH_MAX_PENDING = 32  # queued + running hash operations per process
+    PASSWORD_HASH_QUEUE_TIMEOUT = 5  # seconds to wait for a slot before 503
+    
+    # Per-process cache of users for auth checks (0 disables)
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+    USER_CACHE_TTL_SECONDS = 300
+    USER_CACHE_SYNC_SECONDS = 2  # how stale another worker's user change may be
+    USER_CACHE_LOOKBACK_SECONDS = 30  # allowance for user changes committed out of updated_at order
+    
+    # Rate limiting: per route, key -> (requests, period in seconds).
+    # Keys: ip, user (JWT identity), email and phone (from the JSON body).
+    # Storage is 'memory' (per process) or sqlite:///path shared by workers.
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORAGE = os.getenv('RATE_LIMIT_STORAGE', 'memory')
+    RATE_LIMIT_MEMORY_MAX_KEYS = 100000  # least recently used buckets are dropped beyond this
+    RATE_LIMITS = {
+        'login': {'ip': (30, 60), 'email': (10, 300)},
+        'register': {'ip': (10, 3600)},
+        'checkout': {'ip': (30, 600), 'user': (10, 600), 'phone': (5, 600)}
+    }
+    
+    # Provider analytics
+    PROVIDER_ANALYTICS_CACHE_SECONDS = 60  # 0 disables the per-provider cache
+    PROVIDER_ANALYTICS_CACHE_SIZE = 1000  # least recently used reports are dropped beyond this
+    PROVIDER_ANALYTICS_MAX_DAYS = 366
+    STOCK_RISK_WINDOW_DAYS = 30  # sales history used for the sell-through rate
+    STOCK_RISK_HORIZON_DAYS = 14  # flag products that run out within this
+    
+    # Demand forecasting (flask forecast-demand)
+    FORECAST_HISTORY_DAYS = 365
+    FORECAST_SMOOTHING = 0.3  # exponential smoothing factor, 0 < alpha <= 1
+    FORECAST_LEAD_TIME_DAYS = 14  # alert when stock runs out within the restock lead time
+    FORECAST_COVER_DAYS = 30  # reorder enough to cover lead time plus this
+    FORECAST_MAX_AGE_SECONDS = 6 * 3600  # provider endpoint recomputes older forecasts
+    
+    # Frequently bought together (flask build-recommendations)
+    RECOMMENDATION_STORED = 20  # neighbours kept per product; extras absorb incremental drift
+    RECOMMENDATION_LIMIT = 6  # shown on product and cart pages
+    RECOMMENDATION_MAX_ORDER_ITEMS = 50  # larger (bulk) orders are ignored
+    RECOMMENDATION_SETTLE_SECONDS = 24 * 3600  # pending orders older than this stop holding back updates
+    
+    # Kit sizing calculator
+    SIZING_CACHE_SECONDS = 60  # lifetime of the in-process spec snapshot
+    SIZING_DEPTH_OF_DISCHARGE = 0.8  # usable share of rated battery energy
+    SIZING_WATTS_PER_ROOM = 5  # default LED lamp power
+    SIZING_MAX_UNITS = 10
+    
+    # Storefront browse facets
+    CATALOGUE_PRICE_BANDS = (1000, 2500, 5000, 10000, 20000)  # KES band edges
+    CATALOGUE_WATTAGE_BANDS = (10, 25, 50, 100)
+    CATALOGUE_FACET_CACHE_SECONDS = 30
+    CATALOGUE_FACET_CACHE_SIZE = 1024  # distinct filter signatures kept
+    BROWSE_MAX_LIMIT = 100  # largest browse page
+    
+    # 'sql' queries the database per browse; 'memory' serves browse from an
+    # in-process columnar snapshot of sellable products
+    CATALOGUE_ENGINE = os.getenv('CATALOGUE_ENGINE', 'sql')
+    CATALOGUE_REFRESH_SECONDS = 5  # how often the snapshot polls for changed products
+    CATALOGUE_FULL_REFRESH_SECONDS = 600
+    CATALOGUE_LOOKBACK_SECONDS = 30  # allowance for product changes committed out of updated_at order
+    
+    # Search suggestions (typeahead)
+    SUGGEST_LIMIT = 8
+    SUGGEST_MAX_LIMIT = 20
+    SUGGEST_SCAN_LIMIT = 200  # index entries examined per query
+    SUGGEST_REFRESH_SECONDS = 5
+    SUGGEST_FULL_REFRESH_SECONDS = 600
+    SUGGEST_LOOKBACK_SECONDS = 30  # allowance for changes committed out of updated_at order
+    
+    # Support ticket search
+    TICKET_SEARCH_LIMIT = 20
+    TICKET_SEARCH_MAX_LIMIT = 100
+    TICKET_SEARCH_MAX_TERMS = 10  # words of a query beyond this are ignored
+    
+    # Customer event stream (SSE). Each open stream holds a worker thread, so
+    # serve it from threaded or gevent workers. With several worker processes
+    # set EVENT_STREAM_POLL_SECONDS so streams see other workers' commits.
+    EVENT_STREAM_POLL_SECONDS = float(os.getenv('EVENT_STREAM_POLL_SECONDS', '0'))  # 0: this process only
+    EVENT_STREAM_HEARTBEAT_SECONDS = 15
+    EVENT_STREAM_MAX_SECONDS = 300  # then the client reconnects with Last-Event-ID
+    EVENT_STREAM_RETRY_MS = 3000  # client reconnect delay
+    EVENT_STREAM_LOOKBACK_SECONDS = 5  # allowance for commits landing out of timestamp order
+    
+    # Order and ticket numbers: each worker process leases a node id and
+    # renews it while in use; an abandoned lease is reused once it expires
+    NUMBER_NODE_LEASE_SECONDS = 300
+    
     # Business rules
     MIN_PASSWORD_LENGTH = 8
     MAX_CART_ITEMS = 50
+    SHIPPING_FEE = 1000  # KES, flat per order
+    TAX_RATE = 0.01
     
     # M-PESA Configuration
     MPESA_ENVIRONMENT = os.getenv('MPESA_ENVIRONMENT', 'sandbox')  # sandbox or production
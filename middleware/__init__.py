@@ -1,3 +1,5 @@
 from .auth import token_required, role_required, get_current_user
+from .replica import read_replica
+from .rate_limit import rate_limit
 
-__all__ = ['token_required', 'role_required', 'get_current_user']
+__all__ = ['token_required', 'role_required', 'get_current_user', 'read_replica', 'rate_limit']
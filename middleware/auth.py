@@ -1,7 +1,7 @@
 from functools import wraps
 from flask import request, jsonify
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
-from models_sqlalchemy.user import User
+from services.user_cache import user_cache
 
 def token_required(fn):
     """Decorator to require valid JWT token"""
@@ -22,7 +22,7 @@ def role_required(*allowed_roles):
             try:
                 verify_jwt_in_request()
                 user_id = get_jwt_identity()
-                user = User.query.get(user_id)
+                user = user_cache.get(user_id)
 
                 if not user:
                     return jsonify({'error': 'User not found'}), 404
@@ -37,10 +37,10 @@ def role_required(*allowed_roles):
     return decorator
 
 def get_current_user():
-    """Get current authenticated user"""
+    """Get current authenticated user (cached snapshot, not a session object)"""
     try:
         verify_jwt_in_request()
         user_id = get_jwt_identity()
-        return User.query.get(user_id)
+        return user_cache.get(user_id)
     except:
         return None
@@ -0,0 +1,21 @@
+from functools import wraps
+from flask import jsonify
+from services.rate_limiter import rate_limiter
+
+def rate_limit(name):
+    """Decorator to throttle a route by its Config.RATE_LIMITS[name] rules
+
+    Place it above role_required so rejected requests never touch the database.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            retry_after = rate_limiter.hit(name)
+            if retry_after:
+                return jsonify({
+                    'error': 'Too many requests',
+                    'retry_after': retry_after
+                }), 429, {'Retry-After': str(retry_after)}
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,14 @@
+from functools import wraps
+from flask import g
+from models_sqlalchemy.routing import choose_replica
+
+def read_replica(fn):
+    """Decorator to serve a read-only view from a read replica when configured
+
+    Place it below role_required so the user lookup stays on the primary.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        g.db_replica = choose_replica()
+        return fn(*args, **kwargs)
+    return wrapper
@@ -94,6 +94,13 @@ def run_migrations_online():
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
 
+    # The ticket full-text index (and FTS5's shadow tables) is hand-written
+    # DDL outside the models, so autogenerate must not try to drop it
+    def include_object(object, name, type_, reflected, compare_to):
+        return not (type_ == 'table' and name.startswith('ticket_search'))
+
+    conf_args.setdefault('include_object', include_object)
+
     connectable = get_engine()
 
     with connectable.connect() as connection:
@@ -0,0 +1,25 @@
+"""Seed user cache version
+
+Revision ID: 38dc2d6dae92
+Revises: 9e3f2e375fde
+Create Date: 2026-10-19 06:31:57.572842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '38dc2d6dae92'
+down_revision = '9e3f2e375fde'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Version counter polled by each worker's user cache
+    op.execute("INSERT INTO number_sequences (name, value) VALUES ('user_cache', 0)")
+
+
+def downgrade():
+    op.execute("DELETE FROM number_sequences WHERE name = 'user_cache'")
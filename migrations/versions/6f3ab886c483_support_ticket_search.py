@@ -0,0 +1,50 @@
+"""support ticket search
+
+Revision ID: 6f3ab886c483
+Revises: f79478729c95
+Create Date: 2026-10-19 06:52:01.193680
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f3ab886c483'
+down_revision = 'f79478729c95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "CREATE TABLE ticket_search ("
+            "ticket_id INTEGER PRIMARY KEY REFERENCES support_tickets (id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        )
+        op.execute("CREATE INDEX ix_ticket_search_document ON ticket_search USING GIN (document)")
+        op.execute("""
+            INSERT INTO ticket_search (ticket_id, document)
+            SELECT t.id,
+                   setweight(to_tsvector('english', t.subject), 'A') ||
+                   setweight(to_tsvector('english', t.message || E'\\n' || COALESCE((
+                       SELECT string_agg(r.message, E'\\n' ORDER BY r.id)
+                       FROM ticket_responses r WHERE r.ticket_id = t.id
+                   ), '')), 'B')
+            FROM support_tickets t
+        """)
+    else:
+        op.execute("CREATE VIRTUAL TABLE ticket_search USING fts5(subject, body, tokenize='porter unicode61')")
+        op.execute("""
+            INSERT INTO ticket_search (rowid, subject, body)
+            SELECT t.id, t.subject, t.message || char(10) || COALESCE((
+                SELECT group_concat(r.message, char(10))
+                FROM (SELECT message FROM ticket_responses WHERE ticket_id = t.id ORDER BY id) r
+            ), '')
+            FROM support_tickets t
+        """)
+
+
+def downgrade():
+    op.execute("DROP TABLE ticket_search")
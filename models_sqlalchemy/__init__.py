@@ -3,8 +3,9 @@ SQLAlchemy database config and base models for project
 """
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from .routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class TimestampMixin:
     """Mixin to add created_at and updated_at timestamps"""
@@ -0,0 +1,103 @@
+"""
+Database engine tuning per backend
+SQLite gets WAL and connection pragmas; server databases get a sized,
+health-checked connection pool
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+def engine_options_for(database_uri, pool_size=10, max_overflow=20, pool_recycle=1800,
+                       sqlite_timeout=30):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for a database URI
+
+    Args:
+        database_uri: SQLAlchemy database URI
+        pool_size: Persistent connections per process (server databases)
+        max_overflow: Extra connections allowed under burst
+        pool_recycle: Seconds before a pooled connection is replaced
+        sqlite_timeout: Seconds the sqlite3 driver waits on a locked database
+
+    Returns:
+        dict: Keyword arguments for create_engine
+    """
+    url = make_url(database_uri)
+
+    if url.get_backend_name() == 'sqlite':
+        # In-memory databases are left to Flask-SQLAlchemy's StaticPool
+        if not url.database or url.database == ':memory:':
+            return {}
+
+        # Connections are cheap and WAL lets readers run beside the writer,
+        # so keep a pool sized for the worker's threads
+        return {
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'connect_args': {
+                'timeout': sqlite_timeout,
+                'check_same_thread': False
+            }
+        }
+
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': True
+    }
+
+def _options_from_config(config, database_uri):
+    return engine_options_for(
+        database_uri,
+        pool_size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_MAX_OVERFLOW'],
+        pool_recycle=config['DB_POOL_RECYCLE']
+    )
+
+def configure_engine_options(app):
+    """Fill SQLALCHEMY_ENGINE_OPTIONS for the app's URI (call before db.init_app)"""
+    options = _options_from_config(app.config, app.config['SQLALCHEMY_DATABASE_URI'])
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+def create_replica_engines(app):
+    """Create read-only engines for SQLALCHEMY_REPLICA_URIS"""
+    engines = []
+
+    for uri in app.config.get('SQLALCHEMY_REPLICA_URIS') or []:
+        engine = create_engine(uri, **_options_from_config(app.config, uri))
+
+        if engine.dialect.name == 'sqlite':
+            # A replica copy must never be written to by the app
+            pragmas = dict(app.config.get('SQLITE_PRAGMAS') or {})
+            pragmas.pop('journal_mode', None)
+            pragmas['query_only'] = 'ON'
+            event.listen(engine, 'connect', _sqlite_pragma_listener(pragmas))
+
+        engines.append(engine)
+
+    return engines
+
+def init_engine(app, db):
+    """Apply per-connection settings to the app's engines (call after db.init_app)"""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+
+    with app.app_context():
+        engines = set(db.engines.values())
+
+    for engine in engines:
+        if engine.dialect.name == 'sqlite' and pragmas:
+            event.listen(engine, 'connect', _sqlite_pragma_listener(pragmas))
+
+def _sqlite_pragma_listener(pragmas):
+    statements = [f"PRAGMA {name}={value}" for name, value in pragmas.items()]
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    return set_pragmas
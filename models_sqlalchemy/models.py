@@ -1,7 +1,9 @@
 
 from . import db, TimestampMixin
-import random
-import string
+from datetime import datetime
+from sqlalchemy import DDL, event
+from sqlalchemy.orm import validates
+from utils.specs import parse_battery_wh, parse_hours, parse_panel_efficiency
 
 class ProviderProfile(db.Model, TimestampMixin):
     """Provider business profile"""
@@ -36,9 +38,16 @@ class ProviderProfile(db.Model, TimestampMixin):
 class Product(db.Model, TimestampMixin):
     """Product model"""
     __tablename__ = 'products'
+    __table_args__ = (
+        # Storefront browse filters on both flags and pages by (sort key, id)
+        db.Index('ix_products_browse_price', 'is_active', 'is_approved', 'price', 'id'),
+        db.Index('ix_products_browse_created_at', 'is_active', 'is_approved', 'created_at', 'id'),
+        db.Index('ix_products_browse_wattage', 'is_active', 'is_approved', 'wattage', 'id'),
+        db.Index('ix_products_browse_units_sold', 'is_active', 'is_approved', 'units_sold', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    provider_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    provider_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     price = db.Column(db.Float, nullable=False)
@@ -47,8 +56,22 @@ class Product(db.Model, TimestampMixin):
     solar_panel_type = db.Column(db.String(100))
     lighting_duration = db.Column(db.String(50))
     warranty_period = db.Column(db.String(50))
+    
+    # Numeric specs parsed from the free-form fields above
+    battery_wh = db.Column(db.Float)
+    runtime_hours = db.Column(db.Float)
+    panel_efficiency = db.Column(db.Float)
+    
     stock_quantity = db.Column(db.Integer, default=0)
+    
+    # Sales counters from completed orders, kept by popularity_service
+    units_sold = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    order_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_sold_at = db.Column(db.DateTime)
+    
     image_url = db.Column(db.String(500))
+    image_hash = db.Column(db.String(64), index=True)
+    image_variants = db.Column(db.JSON)
     is_active = db.Column(db.Boolean, default=True)
     is_approved = db.Column(db.Boolean, default=False)
     
@@ -56,6 +79,21 @@ class Product(db.Model, TimestampMixin):
     order_items = db.relationship('OrderItem', backref='product', lazy='dynamic')
     cart_items = db.relationship('CartItem', backref='product', lazy='dynamic')
     
+    @validates('battery_capacity')
+    def _parse_battery_capacity(self, key, value):
+        self.battery_wh = parse_battery_wh(value)
+        return value
+    
+    @validates('lighting_duration')
+    def _parse_lighting_duration(self, key, value):
+        self.runtime_hours = parse_hours(value)
+        return value
+    
+    @validates('solar_panel_type')
+    def _parse_solar_panel_type(self, key, value):
+        self.panel_efficiency = parse_panel_efficiency(value)
+        return value
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -68,8 +106,13 @@ class Product(db.Model, TimestampMixin):
             'solar_panel_type': self.solar_panel_type,
             'lighting_duration': self.lighting_duration,
             'warranty_period': self.warranty_period,
+            'battery_wh': self.battery_wh,
+            'runtime_hours': self.runtime_hours,
+            'panel_efficiency': self.panel_efficiency,
             'stock_quantity': self.stock_quantity,
+            'units_sold': self.units_sold,
             'image_url': self.image_url,
+            'image_variants': self.image_variants,
             'is_active': self.is_active,
             'is_approved': self.is_approved,
             'created_at': self.created_at.isoformat() if self.created_at else None
@@ -78,6 +121,11 @@ class Product(db.Model, TimestampMixin):
 class Order(db.Model, TimestampMixin):
     """Order model"""
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('ix_orders_payment_status_created_at', 'payment_status', 'created_at'),
+        # Customer event streams read a customer's recently updated orders
+        db.Index('ix_orders_customer_id_updated_at', 'customer_id', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -102,7 +150,8 @@ class Order(db.Model, TimestampMixin):
     
     @staticmethod
     def generate_order_number():
-        return 'ORD-' + ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
+        from services.number_service import number_allocator
+        return number_allocator.next_number('ORD')
     
     def to_dict(self):
         return {
@@ -120,13 +169,51 @@ class Order(db.Model, TimestampMixin):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class UnmatchedPayment(db.Model, TimestampMixin):
+    """M-PESA callback with no order to apply it to, kept for reconciliation"""
+    __tablename__ = 'unmatched_payments'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    checkout_request_id = db.Column(db.String(100), index=True)
+    merchant_request_id = db.Column(db.String(100))
+    result_code = db.Column(db.Integer)
+    result_desc = db.Column(db.String(255))
+    amount = db.Column(db.Float)
+    receipt_number = db.Column(db.String(100))
+    transaction_date = db.Column(db.DateTime)
+    phone_number = db.Column(db.String(20))
+    # Set once the payment has been applied to an order
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'))
+    
+    def result(self):
+        """The callback result in the shape order_service.apply_payment_result takes"""
+        return {
+            'result_code': self.result_code,
+            'result_desc': self.result_desc,
+            'amount': self.amount,
+            'receipt_number': self.receipt_number,
+            'transaction_date': self.transaction_date,
+            'phone_number': self.phone_number
+        }
+    
+    def to_dict(self):
+        return dict(
+            self.result(),
+            id=self.id,
+            checkout_request_id=self.checkout_request_id,
+            merchant_request_id=self.merchant_request_id,
+            transaction_date=self.transaction_date.isoformat() if self.transaction_date else None,
+            order_id=self.order_id,
+            created_at=self.created_at.isoformat() if self.created_at else None
+        )
+
 class OrderItem(db.Model, TimestampMixin):
     """Order item model"""
     __tablename__ = 'order_items'
     
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
     
@@ -167,19 +254,20 @@ class SupportTicket(db.Model, TimestampMixin):
     __tablename__ = 'support_tickets'
     
     id = db.Column(db.Integer, primary_key=True)
-    customer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'))
     ticket_number = db.Column(db.String(50), unique=True, nullable=False)
     subject = db.Column(db.String(200), nullable=False)
     message = db.Column(db.Text, nullable=False)
-    status = db.Column(db.String(20), default='open')
+    status = db.Column(db.String(20), default='open', index=True)
     
     # Relationships
     responses = db.relationship('TicketResponse', backref='ticket', lazy='dynamic', cascade='all, delete-orphan')
     
     @staticmethod
     def generate_ticket_number():
-        return 'TKT-' + ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+        from services.number_service import number_allocator
+        return number_allocator.next_number('TKT')
     
     def to_dict(self):
         return {
@@ -197,9 +285,12 @@ class SupportTicket(db.Model, TimestampMixin):
 class TicketResponse(db.Model, TimestampMixin):
     """Ticket response model"""
     __tablename__ = 'ticket_responses'
+    __table_args__ = (
+        db.Index('ix_ticket_responses_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    ticket_id = db.Column(db.Integer, db.ForeignKey('support_tickets.id'), nullable=False)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('support_tickets.id'), nullable=False, index=True)
     responder_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     message = db.Column(db.Text, nullable=False)
     
@@ -213,3 +304,90 @@ class TicketResponse(db.Model, TimestampMixin):
             'responder_role': self.responder.role if self.responder else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+# Full-text index over ticket threads, one row per ticket, kept in sync by
+# services.ticket_search_service. It is dialect-specific DDL rather than a
+# model, so create_all builds it here and migrations by hand.
+TICKET_SEARCH_DDL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS ticket_search "
+        "USING fts5(subject, body, tokenize='porter unicode61')"
+    ],
+    'postgresql': [
+        "CREATE TABLE IF NOT EXISTS ticket_search ("
+        "ticket_id INTEGER PRIMARY KEY REFERENCES support_tickets (id) ON DELETE CASCADE, "
+        "document TSVECTOR NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_ticket_search_document ON ticket_search USING GIN (document)"
+    ]
+}
+
+for _dialect, _statements in TICKET_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(db.metadata, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+event.listen(db.metadata, 'before_drop', DDL('DROP TABLE IF EXISTS ticket_search'))
+
+class NumberSequence(db.Model):
+    """Named counters (e.g. cache versions and job watermarks)"""
+    __tablename__ = 'number_sequences'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+class NodeLease(db.Model):
+    """Number allocator node id held by a worker process until expires_at"""
+    __tablename__ = 'node_leases'
+    
+    node_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    owner = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class RevokedToken(db.Model):
+    """Revoked JWT (logout or refresh-token rotation), kept until it expires"""
+    __tablename__ = 'revoked_tokens'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    token_type = db.Column(db.String(10), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+class DemandForecast(db.Model):
+    """Latest demand forecast per product, written by the forecasting job"""
+    __tablename__ = 'demand_forecasts'
+    
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    provider_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    avg_daily_7 = db.Column(db.Float, nullable=False)
+    avg_daily_28 = db.Column(db.Float, nullable=False)
+    forecast_daily = db.Column(db.Float, nullable=False)
+    stock_quantity = db.Column(db.Integer, nullable=False)
+    days_until_stockout = db.Column(db.Float)
+    reorder_quantity = db.Column(db.Integer, nullable=False, default=0)
+    computed_at = db.Column(db.DateTime, nullable=False)
+    
+    product = db.relationship('Product')
+    
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'product_name': self.product.name if self.product else None,
+            'avg_daily_7': self.avg_daily_7,
+            'avg_daily_28': self.avg_daily_28,
+            'forecast_daily': self.forecast_daily,
+            'stock_quantity': self.stock_quantity,
+            'days_until_stockout': self.days_until_stockout,
+            'reorder_quantity': self.reorder_quantity,
+            'computed_at': self.computed_at.isoformat()
+        }
+
+class ProductRecommendation(db.Model):
+    """Top-K products most often bought together with a product"""
+    __tablename__ = 'product_recommendations'
+    
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    rank = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    recommended_product_id = db.Column(
+        db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), nullable=False
+    )
+    score = db.Column(db.Integer, nullable=False)
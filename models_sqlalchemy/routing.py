@@ -0,0 +1,80 @@
+"""
+Read/write splitting
+Routes reads made inside @read_replica views to a replica engine, keeping
+writes and recent writers on the primary
+"""
+import random
+import threading
+import time
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+STICKY_COOKIE = 'db_primary'
+
+_recent_writers = {}
+_recent_writers_lock = threading.Lock()
+
+class RoutingSession(Session):
+    """Session that sends reads to the request's replica, if one was chosen"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            if self._flushing or isinstance(clause, UpdateBase):
+                g.db_wrote = True
+            elif g.get('db_replica') is not None:
+                return g.db_replica
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def _current_identity():
+    try:
+        from flask_jwt_extended import get_jwt_identity
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+def choose_replica():
+    """Pick a replica engine for this request, or None to stay on the primary"""
+    replicas = current_app.extensions.get('db_replicas')
+    if not replicas:
+        return None
+
+    # Read-your-writes: clients that just wrote read from the primary until
+    # the replicas have had time to catch up
+    if request.cookies.get(STICKY_COOKIE):
+        return None
+
+    identity = _current_identity()
+    if identity is not None:
+        wrote_at = _recent_writers.get(identity)
+        if wrote_at and time.monotonic() - wrote_at < current_app.config['READ_YOUR_WRITES_SECONDS']:
+            return None
+
+    return random.choice(replicas)
+
+def _remember_writer(response):
+    if not g.get('db_wrote'):
+        return response
+
+    window = current_app.config['READ_YOUR_WRITES_SECONDS']
+    identity = _current_identity()
+
+    if identity is not None:
+        now = time.monotonic()
+        with _recent_writers_lock:
+            _recent_writers[identity] = now
+            if len(_recent_writers) > 10000:
+                for key, wrote_at in list(_recent_writers.items()):
+                    if now - wrote_at >= window:
+                        del _recent_writers[key]
+
+    response.set_cookie(STICKY_COOKIE, '1', max_age=window, httponly=True)
+    return response
+
+def init_replicas(app, replicas):
+    """Register replica engines and read-your-writes tracking on the app"""
+    app.extensions['db_replicas'] = replicas
+    if replicas:
+        app.after_request(_remember_writer)
@@ -1,10 +1,14 @@
 
 from . import db, TimestampMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from services.password_service import password_service
 
 class User(db.Model, TimestampMixin):
     """User model for customers, providers, and admins"""
     __tablename__ = 'users'
+    __table_args__ = (
+        # Polled by each worker's user cache for changed users
+        db.Index('ix_users_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
@@ -24,11 +28,15 @@ class User(db.Model, TimestampMixin):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_service.hash(password)
     
     def check_password(self, password):
         """Check if password matches hash"""
-        return check_password_hash(self.password_hash, password)
+        return password_service.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Check if the hash predates the configured hash parameters"""
+        return password_service.needs_rehash(self.password_hash)
     
     def to_dict(self):
         """Serialize to dictionary"""
@@ -3,52 +3,138 @@ Admin routes - Provider approval, Product approval, User management
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime, timedelta
 from models_sqlalchemy import db
 from models_sqlalchemy.user import User
 from models_sqlalchemy.models import ProviderProfile, Product, Order
 from middleware.auth import role_required
+from middleware.replica import read_replica
+from services.user_cache import user_cache
 
 admin_bp = Blueprint('admin', __name__)
 
+# ============== LISTING HELPERS ==============
+
+def _parse_date_arg(name):
+    """Parse an ISO date/datetime query parameter (raises ValueError)"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO date, e.g. 2026-01-31')
+
+def _apply_listing_params(query, created_column, sort_columns):
+    """Apply created_from/created_to and sort/order query parameters"""
+    created_from = _parse_date_arg('created_from')
+    created_to = _parse_date_arg('created_to')
+    
+    if created_from:
+        query = query.filter(created_column >= created_from)
+    if created_to:
+        if len(request.args['created_to']) <= 10:  # bare date: include the whole day
+            query = query.filter(created_column < created_to + timedelta(days=1))
+        else:
+            query = query.filter(created_column <= created_to)
+    
+    sort = request.args.get('sort', 'created_at')
+    if sort not in sort_columns:
+        raise ValueError(f"sort must be one of: {', '.join(sort_columns)}")
+    
+    order = request.args.get('order', 'desc')
+    if order not in ('asc', 'desc'):
+        raise ValueError('order must be one of: asc, desc')
+    
+    column = sort_columns[sort]
+    if order == 'asc':
+        return query.order_by(column.asc())
+    return query.order_by(column.desc())
+
+def _provider_listing(is_approved):
+    """Provider profiles joined to their user in one query"""
+    query = db.session.query(ProviderProfile, User.email, User.full_name)\
+        .join(User, User.id == ProviderProfile.user_id)\
+        .filter(ProviderProfile.is_approved == is_approved)
+    
+    business_name = request.args.get('business_name', '').strip()
+    if business_name:
+        query = query.filter(ProviderProfile.business_name.ilike(f'%{business_name}%'))
+    
+    query = _apply_listing_params(query, ProviderProfile.created_at, {
+        'created_at': ProviderProfile.created_at,
+        'business_name': ProviderProfile.business_name
+    })
+    
+    providers_data = []
+    for provider, email, full_name in query.all():
+        provider_dict = provider.to_dict()
+        provider_dict['user_email'] = email
+        provider_dict['user_name'] = full_name
+        providers_data.append(provider_dict)
+    
+    return providers_data
+
+def _product_listing(is_approved=None):
+    """Products joined to their provider's user and profile in one query"""
+    query = db.session.query(Product, User.full_name, ProviderProfile.business_name)\
+        .join(User, User.id == Product.provider_id)\
+        .outerjoin(ProviderProfile, ProviderProfile.user_id == Product.provider_id)
+    
+    if is_approved is not None:
+        query = query.filter(Product.is_approved == is_approved)
+    
+    provider_id = request.args.get('provider_id', type=int)
+    if provider_id:
+        query = query.filter(Product.provider_id == provider_id)
+    
+    business_name = request.args.get('business_name', '').strip()
+    if business_name:
+        query = query.filter(ProviderProfile.business_name.ilike(f'%{business_name}%'))
+    
+    search = request.args.get('search', '').strip()
+    if search:
+        query = query.filter(Product.name.ilike(f'%{search}%'))
+    
+    query = _apply_listing_params(query, Product.created_at, {
+        'created_at': Product.created_at,
+        'name': Product.name,
+        'price': Product.price,
+        'business_name': ProviderProfile.business_name
+    })
+    
+    products_data = []
+    for product, full_name, business_name in query.all():
+        product_dict = product.to_dict()
+        product_dict['provider_name'] = full_name
+        product_dict['business_name'] = business_name
+        products_data.append(product_dict)
+    
+    return products_data
+
 # ============== PROVIDER MANAGEMENT ==============
 
 @admin_bp.route('/providers/pending', methods=['GET'])
 @role_required('admin')
+@read_replica
 def get_pending_providers():
     """Get all pending provider profiles"""
     try:
-        providers = ProviderProfile.query.filter_by(is_approved=False).all()
-        
-        providers_data = []
-        for provider in providers:
-            provider_dict = provider.to_dict()
-            user = User.query.get(provider.user_id)
-            if user:
-                provider_dict['user_email'] = user.email
-                provider_dict['user_name'] = user.full_name
-            providers_data.append(provider_dict)
-        
-        return jsonify({'providers': providers_data}), 200
+        return jsonify({'providers': _provider_listing(is_approved=False)}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/providers/approved', methods=['GET'])
 @role_required('admin')
+@read_replica
 def get_approved_providers():
     """Get all approved provider profiles"""
     try:
-        providers = ProviderProfile.query.filter_by(is_approved=True).all()
-        
-        providers_data = []
-        for provider in providers:
-            provider_dict = provider.to_dict()
-            user = User.query.get(provider.user_id)
-            if user:
-                provider_dict['user_email'] = user.email
-                provider_dict['user_name'] = user.full_name
-            providers_data.append(provider_dict)
-        
-        return jsonify({'providers': providers_data}), 200
+        return jsonify({'providers': _provider_listing(is_approved=True)}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -100,39 +186,25 @@ def reject_provider(provider_id):
 
 @admin_bp.route('/products/pending', methods=['GET'])
 @role_required('admin')
+@read_replica
 def get_pending_products():
     """Get all pending products"""
     try:
-        products = Product.query.filter_by(is_approved=False).all()
-        
-        products_data = []
-        for product in products:
-            product_dict = product.to_dict()
-            user = User.query.get(product.provider_id)
-            if user:
-                product_dict['provider_name'] = user.full_name
-            products_data.append(product_dict)
-        
-        return jsonify({'products': products_data}), 200
+        return jsonify({'products': _product_listing(is_approved=False)}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/products/all', methods=['GET'])
 @role_required('admin')
+@read_replica
 def get_all_products():
     """Get all products"""
     try:
-        products = Product.query.all()
-        
-        products_data = []
-        for product in products:
-            product_dict = product.to_dict()
-            user = User.query.get(product.provider_id)
-            if user:
-                product_dict['provider_name'] = user.full_name
-            products_data.append(product_dict)
-        
-        return jsonify({'products': products_data}), 200
+        return jsonify({'products': _product_listing()}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -184,6 +256,7 @@ def reject_product(product_id):
 
 @admin_bp.route('/users', methods=['GET'])
 @role_required('admin')
+@read_replica
 def get_users():
     """Get all users"""
     try:
@@ -253,6 +326,7 @@ def deactivate_user(user_id):
 
 @admin_bp.route('/analytics', methods=['GET'])
 @role_required('admin')
+@read_replica
 def get_analytics():
     """Get platform analytics"""
     try:
@@ -282,3 +356,13 @@ def get_analytics():
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/cache/stats', methods=['GET'])
+@role_required('admin')
+def get_cache_stats():
+    """Get this worker's cache counters"""
+    try:
+        return jsonify({'user_cache': user_cache.stats()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -2,14 +2,22 @@
 Authentication routes
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token, decode_token,
+    jwt_required, get_jwt, get_jwt_identity
+)
 from models_sqlalchemy import db
 from models_sqlalchemy.user import User
 from utils.validators import validate_email, validate_password
+from services.password_service import PasswordServiceBusy
+from middleware.rate_limit import rate_limit
+from services.token_service import token_revocation_service
+from services.user_cache import user_cache
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/register', methods=['POST'])
+@rate_limit('register')
 def register():
     """Register a new user"""
     try:
@@ -51,20 +59,26 @@ def register():
         db.session.add(user)
         db.session.commit()
         
-        # Create access token
+        # Create tokens
         access_token = create_access_token(identity=user.id)
+        refresh_token = create_refresh_token(identity=user.id)
         
         return jsonify({
             'message': 'Registration successful',
             'user': user.to_dict(),
-            'access_token': access_token
+            'access_token': access_token,
+            'refresh_token': refresh_token
         }), 201
         
+    except PasswordServiceBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit('login')
 def login():
     """Login user"""
     try:
@@ -82,16 +96,26 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Account is inactive'}), 403
         
-        # Create access token
+        # Upgrade hashes made with old parameters while we have the password
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+        
+        # Create tokens
         access_token = create_access_token(identity=user.id)
+        refresh_token = create_refresh_token(identity=user.id)
         
         return jsonify({
             'message': 'Login successful',
             'user': user.to_dict(),
-            'access_token': access_token
+            'access_token': access_token,
+            'refresh_token': refresh_token
         }), 200
         
+    except PasswordServiceBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/me', methods=['GET'])
@@ -100,7 +124,7 @@ def get_current_user():
     """Get current authenticated user"""
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = user_cache.get(user_id)
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -110,8 +134,53 @@ def get_current_user():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """Exchange a refresh token for new access and refresh tokens"""
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        
+        if not user or not user.is_active:
+            return jsonify({'error': 'Account is inactive'}), 401
+        
+        # Rotate: the presented refresh token cannot be used again. If a
+        # concurrent request already rotated it, this one loses
+        if not token_revocation_service.revoke(get_jwt()):
+            return jsonify({'error': 'Token has been revoked'}), 401
+        
+        return jsonify({
+            'access_token': create_access_token(identity=user.id),
+            'refresh_token': create_refresh_token(identity=user.id)
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
     """Logout user"""
-    return jsonify({'message': 'Logout successful'}), 200
+    try:
+        payloads = [get_jwt()]
+        
+        # Revoke the session's refresh token too when the client sends it
+        data = request.get_json(silent=True) or {}
+        if data.get('refresh_token'):
+            try:
+                refresh_payload = decode_token(data['refresh_token'])
+            except Exception:
+                return jsonify({'error': 'Invalid refresh token'}), 400
+            if refresh_payload.get('sub') != get_jwt_identity() or refresh_payload.get('type') != 'refresh':
+                return jsonify({'error': 'Invalid refresh token'}), 400
+            payloads.append(refresh_payload)
+        
+        token_revocation_service.revoke(*payloads)
+        
+        return jsonify({'message': 'Logout successful'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
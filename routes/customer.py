@@ -1,15 +1,28 @@
 """
 Customer routes - Products, Cart, Checkout, Orders, Support
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models_sqlalchemy import db
 from models_sqlalchemy.user import User
 from models_sqlalchemy.models import (
-    Product, CartItem, Order, OrderItem, SupportTicket
+    Product, CartItem, Order, SupportTicket
 )
 from services.mpesa_service import mpesa_service
+from services.cart_service import cart_service
+from services.order_service import order_service
+from services.recommendation_service import recommendation_service
+from services.sizing_service import sizing_service
+from services.suggest_service import suggest_service
+from services.ticket_service import ticket_service
+from services.event_stream_service import event_stream_service
+from services.catalogue_service import (
+    SORTS, browse_page, catalogue_engine, decode_cursor, facet_service, parse_browse_filters
+)
 from middleware.auth import role_required
+from middleware.replica import read_replica
+from middleware.rate_limit import rate_limit
+from datetime import datetime
 
 customer_bp = Blueprint('customer', __name__)
 
@@ -17,52 +30,83 @@ customer_bp = Blueprint('customer', __name__)
 
 @customer_bp.route('/products', methods=['GET'])
 @role_required('customer')
+@read_replica
 def browse_products():
-    """Browse approved products with filters"""
+    """Browse approved products with filters and facet counts"""
     try:
-        # Get query parameters
-        search = request.args.get('search', '').strip()
-        min_price = request.args.get('min_price', type=float)
-        max_price = request.args.get('max_price', type=float)
-        min_wattage = request.args.get('min_wattage', type=int)
-        max_wattage = request.args.get('max_wattage', type=int)
-        
-        # Base query - only approved and active products
-        query = Product.query.filter_by(is_active=True, is_approved=True)
-        
-        # Apply filters
-        if search:
-            query = query.filter(
-                db.or_(
-                    Product.name.ilike(f'%{search}%'),
-                    Product.description.ilike(f'%{search}%')
-                )
-            )
+        try:
+            filters = parse_browse_filters(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        sort = request.args.get('sort')
+        if sort and sort not in SORTS:
+            return jsonify({'error': f"sort must be one of: {', '.join(SORTS)}"}), 400
+        
+        # Paging (limit, then cursor from the previous page's next_cursor)
+        limit = request.args.get('limit', type=int)
+        if limit is not None and not 1 <= limit <= current_app.config['BROWSE_MAX_LIMIT']:
+            return jsonify({
+                'error': f"limit must be between 1 and {current_app.config['BROWSE_MAX_LIMIT']}"
+            }), 400
+        if limit is not None and not sort:
+            sort = 'newest'
+        
+        cursor = request.args.get('cursor')
+        if cursor:
+            if limit is None:
+                return jsonify({'error': 'cursor requires limit'}), 400
+            try:
+                cursor = decode_cursor(cursor, sort)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            cursor = None
         
-        if min_price is not None:
-            query = query.filter(Product.price >= min_price)
+        with_facets = request.args.get('facets', 'true').lower() != 'false'
         
-        if max_price is not None:
-            query = query.filter(Product.price <= max_price)
+        if current_app.config['CATALOGUE_ENGINE'] == 'memory':
+            body = catalogue_engine.browse(filters, sort, with_facets, cursor, limit)
+            return current_app.response_class(body, mimetype='application/json'), 200
         
-        if min_wattage is not None:
-            query = query.filter(Product.wattage >= min_wattage)
+        products, next_cursor, total = browse_page(filters, sort, cursor, limit)
         
-        if max_wattage is not None:
-            query = query.filter(Product.wattage <= max_wattage)
+        response = {
+            'products': [p.to_dict() for p in products],
+            'total': total
+        }
         
-        products = query.all()
+        if limit is not None:
+            response['next_cursor'] = next_cursor
         
-        return jsonify({
-            'products': [p.to_dict() for p in products],
-            'total': len(products)
-        }), 200
+        if with_facets:
+            response['facets'] = facet_service.facets(filters)
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@customer_bp.route('/products/suggest', methods=['GET'])
+@role_required('customer')
+@read_replica
+def suggest_products():
+    """Typeahead suggestions for the search box"""
+    try:
+        prefix = request.args.get('q', '')
+        limit = request.args.get('limit', type=int)
+        
+        if limit is not None and limit < 1:
+            return jsonify({'error': 'limit must be positive'}), 400
+        
+        return jsonify({'suggestions': suggest_service.suggest(prefix, limit)}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @customer_bp.route('/products/<int:product_id>', methods=['GET'])
 @role_required('customer')
+@read_replica
 def get_product(product_id):
     """Get product details"""
     try:
@@ -71,7 +115,53 @@ def get_product(product_id):
         if not product or not product.is_active or not product.is_approved:
             return jsonify({'error': 'Product not found'}), 404
         
-        return jsonify({'product': product.to_dict()}), 200
+        return jsonify({
+            'product': product.to_dict(),
+            'frequently_bought_together': [
+                p.to_dict() for p in recommendation_service.for_product(product_id)
+            ]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@customer_bp.route('/sizing', methods=['GET'])
+@role_required('customer')
+@read_replica
+def size_kit():
+    """Recommend kits for a lighting load, e.g. ?rooms=4&hours=6"""
+    try:
+        rooms = request.args.get('rooms', type=int)
+        hours = request.args.get('hours', type=float)
+        watts_per_room = request.args.get(
+            'watts_per_room', current_app.config['SIZING_WATTS_PER_ROOM'], type=float
+        )
+        extra_watts = request.args.get('extra_watts', 0, type=float)
+        max_price = request.args.get('max_price', type=float)
+        limit = min(request.args.get('limit', 10, type=int), 50)
+        
+        if not rooms or rooms < 1 or not hours or hours <= 0 or hours > 24:
+            return jsonify({'error': 'rooms (>= 1) and hours (0-24) are required'}), 400
+        
+        if watts_per_room <= 0 or extra_watts < 0 or limit < 1:
+            return jsonify({'error': 'Invalid load parameters'}), 400
+        
+        result = sizing_service.rank(
+            rooms, hours, watts_per_room, extra_watts=extra_watts,
+            max_price=max_price, limit=limit
+        )
+        
+        product_ids = [kit['product_id'] for kit in result['kits']]
+        products = {
+            p.id: p for p in Product.query.filter(Product.id.in_(product_ids)).all()
+        } if product_ids else {}
+        
+        for kit in result['kits']:
+            product = products.get(kit.pop('product_id'))
+            kit['product'] = product.to_dict() if product else None
+        result['kits'] = [kit for kit in result['kits'] if kit['product']]
+        
+        return jsonify(result), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -85,24 +175,44 @@ def get_cart():
     try:
         user_id = get_jwt_identity()
         
-        cart_items = CartItem.query.filter_by(customer_id=user_id).all()
+        cart = cart_service.get_cart(user_id)
+        cart['recommendations'] = [
+            p.to_dict() for p in recommendation_service.for_products(
+                {item['product_id'] for item in cart['items']}
+            )
+        ]
         
-        items = []
-        subtotal = 0
+        return jsonify(cart), 200
         
-        for item in cart_items:
-            item_dict = item.to_dict()
-            items.append(item_dict)
-            if item.product:
-                subtotal += item.product.price * item.quantity
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@customer_bp.route('/cart', methods=['PUT'])
+@role_required('customer')
+def sync_cart():
+    """Replace the cart (or apply a diff with mode=merge) in one request"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
         
-        return jsonify({
-            'items': items,
-            'subtotal': subtotal,
-            'item_count': len(items)
-        }), 200
+        items = data.get('items')
+        if not isinstance(items, list):
+            return jsonify({'error': 'items must be a list'}), 400
+        
+        mode = data.get('mode', 'replace')
+        if mode not in ('replace', 'merge'):
+            return jsonify({'error': 'mode must be replace or merge'}), 400
+        
+        try:
+            cart = cart_service.sync_cart(user_id, items, replace=(mode == 'replace'))
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify(cart), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @customer_bp.route('/cart/add', methods=['POST'])
@@ -227,6 +337,7 @@ def clear_cart():
 # ============== CHECKOUT & ORDERS ==============
 
 @customer_bp.route('/checkout', methods=['POST'])
+@rate_limit('checkout')
 @role_required('customer')
 def checkout():
     """Process checkout with M-PESA integration"""
@@ -240,70 +351,60 @@ def checkout():
             if not data.get(field):
                 return jsonify({'error': f'{field} is required'}), 400
         
-        # Get cart items
-        cart_items = CartItem.query.filter_by(customer_id=user_id).all()
+        # Get cart lines and totals
+        cart = cart_service.get_cart(user_id)
         
-        if not cart_items:
+        if not cart['items']:
             return jsonify({'error': 'Cart is empty'}), 400
         
         # Validate stock
-        for item in cart_items:
-            if not item.product or not item.product.is_active:
+        for item in cart['items']:
+            if not item['is_available']:
                 return jsonify({'error': f'Product unavailable'}), 400
             
-            if item.product.stock_quantity < item.quantity:
-                return jsonify({'error': f'Insufficient stock for {item.product.name}'}), 400
+            if item['stock_quantity'] < item['quantity']:
+                return jsonify({'error': f"Insufficient stock for {item['name']}"}), 400
         
-        # Calculate total
-        subtotal = sum(item.product.price * item.quantity for item in cart_items)
-        shipping = 1000
-        tax = subtotal * 0.01
-        total = subtotal + shipping + tax
-        
-        # Create order
-        order = Order(
-            customer_id=user_id,
-            order_number=Order.generate_order_number(),
-            total_amount=total,
-            payment_method=data['payment_method'],
-            shipping_address=data['shipping_address'],
-            phone_number=data['phone_number'],
-            payment_status='pending',
-            order_status='pending'
-        )
-        
-        db.session.add(order)
-        db.session.flush()
-        
-        # Add order items
-        for cart_item in cart_items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=cart_item.product_id,
-                quantity=cart_item.quantity,
-                price=cart_item.product.price
-            )
-            db.session.add(order_item)
-        
-        db.session.commit()
+        order_fields = {
+            'order_number': Order.generate_order_number(),
+            'payment_method': data['payment_method'],
+            'shipping_address': data['shipping_address'],
+            'phone_number': data['phone_number']
+        }
         
         # Process M-PESA payment
         if data['payment_method'] == 'mpesa':
+            # Persist the pending order before the push so a callback always
+            # has an order to land on; the commit also releases every lock
+            # before the M-PESA round trip. The cart stays until the push
+            # is accepted.
+            order = order_service.create_order(user_id, cart, dict(
+                order_fields,
+                payment_status='pending',
+                order_status='pending'
+            ), clear_cart=False)
+            
             mpesa_result = mpesa_service.initiate_stk_push(
                 phone_number=data['phone_number'],
-                amount=total,
-                account_reference=order.order_number,
-                transaction_desc=f"Payment for Order {order.order_number}"
+                amount=cart['total'],
+                account_reference=order_fields['order_number'],
+                transaction_desc=f"Payment for Order {order_fields['order_number']}"
             )
             
             if mpesa_result['success']:
-                order.mpesa_checkout_request_id = mpesa_result.get('checkout_request_id')
-                order.mpesa_merchant_request_id = mpesa_result.get('merchant_request_id')
-                db.session.commit()
-                
-                # Clear cart
-                CartItem.query.filter_by(customer_id=user_id).delete()
-                db.session.commit()
+                try:
+                    order = order_service.attach_payment_request(
+                        order,
+                        mpesa_result.get('checkout_request_id'),
+                        mpesa_result.get('merchant_request_id')
+                    )
+                except Exception as e:
+                    # The customer has already been prompted; a callback for
+                    # this push is kept as an unmatched payment
+                    print(
+                        f"Could not record M-PESA request {mpesa_result.get('checkout_request_id')} "
+                        f"for order {order_fields['order_number']}: {e}"
+                    )
                 
                 return jsonify({
                     'message': 'M-PESA payment initiated. Check your phone.',
@@ -314,8 +415,8 @@ def checkout():
                     }
                 }), 201
             else:
-                order.payment_status = 'failed'
-                db.session.commit()
+                # Record the failed attempt but keep the cart for a retry
+                order_service.fail_payment(order, order_status='pending')
                 
                 return jsonify({
                     'error': 'M-PESA payment failed',
@@ -324,13 +425,11 @@ def checkout():
         
         else:
             # Other payment methods
-            order.payment_status = 'completed'
-            order.order_status = 'processing'
-            db.session.commit()
-            
-            # Clear cart
-            CartItem.query.filter_by(customer_id=user_id).delete()
-            db.session.commit()
+            order = order_service.create_order(user_id, cart, dict(
+                order_fields,
+                payment_status='completed',
+                order_status='processing'
+            ))
             
             return jsonify({
                 'message': 'Order placed successfully',
@@ -343,6 +442,7 @@ def checkout():
 
 @customer_bp.route('/orders', methods=['GET'])
 @role_required('customer')
+@read_replica
 def get_orders():
     """Get customer's order history"""
     try:
@@ -364,6 +464,7 @@ def get_orders():
 
 @customer_bp.route('/orders/<int:order_id>', methods=['GET'])
 @role_required('customer')
+@read_replica
 def get_order(order_id):
     """Get order details"""
     try:
@@ -386,21 +487,21 @@ def get_order(order_id):
 
 @customer_bp.route('/tickets', methods=['GET'])
 @role_required('customer')
+@read_replica
 def get_tickets():
     """Get customer's support tickets"""
     try:
         user_id = get_jwt_identity()
         
-        tickets = SupportTicket.query.filter_by(customer_id=user_id)\
-            .order_by(SupportTicket.created_at.desc()).all()
+        summary = request.args.get('summary', 'false').lower() == 'true'
         
-        tickets_data = []
-        for ticket in tickets:
-            ticket_dict = ticket.to_dict()
-            ticket_dict['responses'] = [r.to_dict() for r in ticket.responses]
-            tickets_data.append(ticket_dict)
+        tickets = ticket_service.serialize(
+            SupportTicket.query.filter_by(customer_id=user_id)
+            .order_by(SupportTicket.created_at.desc()),
+            summary=summary
+        )
         
-        return jsonify({'tickets': tickets_data}), 200
+        return jsonify({'tickets': tickets}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -445,20 +546,45 @@ def create_ticket():
 
 @customer_bp.route('/tickets/<int:ticket_id>', methods=['GET'])
 @role_required('customer')
+@read_replica
 def get_ticket(ticket_id):
     """Get ticket details with responses"""
     try:
         user_id = get_jwt_identity()
         
-        ticket = SupportTicket.query.get(ticket_id)
+        tickets = ticket_service.serialize(
+            SupportTicket.query.filter_by(id=ticket_id, customer_id=user_id)
+        )
         
-        if not ticket or ticket.customer_id != user_id:
+        if not tickets:
             return jsonify({'error': 'Ticket not found'}), 404
         
-        ticket_dict = ticket.to_dict()
-        ticket_dict['responses'] = [r.to_dict() for r in ticket.responses]
+        return jsonify({'ticket': tickets[0]}), 200
         
-        return jsonify({'ticket': ticket_dict}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============== EVENTS ==============
+
+@customer_bp.route('/events', methods=['GET'])
+@role_required('customer')
+def stream_events():
+    """Server-Sent Events stream of order status changes and ticket replies"""
+    try:
+        user_id = get_jwt_identity()
+        
+        # EventSource resends the last event id (a timestamp) on reconnect
+        since = request.headers.get('Last-Event-ID') or request.args.get('since')
+        try:
+            since = datetime.fromisoformat(since) if since else None
+        except ValueError:
+            return jsonify({'error': 'since must be an ISO timestamp'}), 400
+        
+        return current_app.response_class(
+            stream_with_context(event_stream_service.stream(user_id, since)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,79 @@
+"""
+Media routes - Serve uploaded product images
+"""
+from flask import Blueprint, current_app, request, send_file, abort
+from werkzeug.security import safe_join
+import glob
+import mimetypes
+import os
+import re
+
+media_bp = Blueprint('media', __name__)
+
+# Uploads are stored as <sha256>.<ext> and variants as <sha256>_<name>.webp,
+# so the bytes behind such a name never change
+HASHED_NAME = re.compile(r'^(?P<digest>[0-9a-f]{64})(?P<variant>_[a-z0-9]+)?\.[a-z0-9]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+def _original_path(upload_folder, digest):
+    """Stored original for an image digest, whatever its extension"""
+    for path in glob.glob(os.path.join(upload_folder, f"{digest}.*")):
+        if HASHED_NAME.match(os.path.basename(path)):
+            return path
+    return None
+
+@media_bp.route('/<path:filename>', methods=['GET'])
+def serve_media(filename):
+    """Serve an uploaded image or one of its variants"""
+    upload_folder = os.path.abspath(current_app.config['UPLOAD_FOLDER'])
+    path = safe_join(upload_folder, filename)
+
+    if path is None:
+        abort(404)
+
+    hashed = HASHED_NAME.match(os.path.basename(filename))
+    etag = hashed.group('digest') if hashed else True
+
+    # Content-hashed names can be revalidated without touching the disk
+    if hashed and etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    fallback = False
+    if not os.path.isfile(path):
+        # A variant still rendering (or whose render failed) is served as
+        # its original, uncached, until the variant file exists
+        original = None
+        if hashed and hashed.group('variant'):
+            original = _original_path(upload_folder, hashed.group('digest'))
+        if not original:
+            abort(404)
+        path, filename, etag, fallback = original, os.path.basename(original), True, True
+
+    accel_prefix = current_app.config['MEDIA_ACCEL_REDIRECT_PREFIX']
+
+    if accel_prefix:
+        # Hand the bytes (and Range handling) to the front proxy
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{filename}"
+        if hashed and not fallback:
+            response.set_etag(etag)
+    else:
+        # send_file streams via wsgi.file_wrapper (sendfile under gunicorn),
+        # honours USE_X_SENDFILE and answers Range/If-None-Match itself
+        response = send_file(
+            path,
+            conditional=True,
+            etag=etag,
+            max_age=current_app.config['MEDIA_MAX_AGE']
+        )
+
+    if fallback:
+        response.headers['Cache-Control'] = 'no-cache'
+    elif hashed:
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+
+    return response
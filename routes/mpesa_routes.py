@@ -3,9 +3,9 @@ M-PESA integration routes
 Handles M-PESA STK Push and callbacks
 """
 from flask import Blueprint, request, jsonify
-from models_sqlalchemy import db
 from models_sqlalchemy.models import Order
 from services.mpesa_service import mpesa_service
+from services.order_service import order_service
 from datetime import datetime
 
 mpesa_bp = Blueprint('mpesa', __name__)
@@ -31,60 +31,56 @@ def mpesa_callback():
         merchant_request_id = callback_body.get('MerchantRequestID')
         checkout_request_id = callback_body.get('CheckoutRequestID')
         
-        # Find order by checkout_request_id
-        order = Order.query.filter_by(mpesa_checkout_request_id=checkout_request_id).first()
+        # Parse the result and, for a successful payment, its metadata
+        result = {
+            'result_code': result_code,
+            'result_desc': result_desc,
+            'amount': None,
+            'receipt_number': None,
+            'transaction_date': None,
+            'phone_number': None
+        }
         
-        if not order:
-            print(f"Order not found for CheckoutRequestID: {checkout_request_id}")
-            return jsonify({
-                'ResultCode': 0,
-                'ResultDesc': 'Success'
-            }), 200
-        
-        # Payment successful
         if result_code == 0:
-            # Extract callback metadata
             callback_metadata = callback_body.get('CallbackMetadata', {}).get('Item', [])
             
-            # Parse metadata
-            amount = None
-            receipt_number = None
-            transaction_date = None
-            phone_number = None
-            
             for item in callback_metadata:
                 name = item.get('Name')
                 value = item.get('Value')
                 
                 if name == 'Amount':
-                    amount = value
+                    result['amount'] = value
                 elif name == 'MpesaReceiptNumber':
-                    receipt_number = value
+                    result['receipt_number'] = value
                 elif name == 'TransactionDate':
                     # Format: 20231215143022
-                    transaction_date = datetime.strptime(str(value), '%Y%m%d%H%M%S')
+                    result['transaction_date'] = datetime.strptime(str(value), '%Y%m%d%H%M%S')
                 elif name == 'PhoneNumber':
-                    phone_number = value
-            
-            # Update order
-            order.payment_status = 'completed'
-            order.order_status = 'processing'
-            order.mpesa_receipt_number = receipt_number
-            order.mpesa_transaction_date = transaction_date
-            order.mpesa_phone_number = phone_number
-            
-            db.session.commit()
-            
+                    result['phone_number'] = str(value)
+        
+        # Find order by checkout_request_id
+        order = Order.query.filter_by(mpesa_checkout_request_id=checkout_request_id).first()
+        
+        if not order:
+            # Keep it for reconciliation; checkout applies it if its order
+            # is still being recorded
+            payment = order_service.record_unmatched_payment(checkout_request_id, merchant_request_id, result)
+            if payment.order_id:
+                print(f"Order for CheckoutRequestID {checkout_request_id} was recorded meanwhile, payment applied")
+            else:
+                print(f"Order not found for CheckoutRequestID: {checkout_request_id}, recorded as unmatched")
+            return jsonify({
+                'ResultCode': 0,
+                'ResultDesc': 'Success'
+            }), 200
+        
+        order_service.apply_payment_result(order, result)
+        
+        if result_code == 0:
             print(f"✅ Payment successful for order {order.order_number}")
-            print(f"   Receipt: {receipt_number}")
-            print(f"   Amount: {amount}")
-            
+            print(f"   Receipt: {result['receipt_number']}")
+            print(f"   Amount: {result['amount']}")
         else:
-            # Payment failed
-            order.payment_status = 'failed'
-            order.order_status = 'cancelled'
-            db.session.commit()
-            
             print(f"❌ Payment failed for order {order.order_number}")
             print(f"   Reason: {result_desc}")
         
@@ -1,12 +1,19 @@
 """
 Provider routes - Profile, Products, Support
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models_sqlalchemy import db
 from models_sqlalchemy.user import User
 from models_sqlalchemy.models import ProviderProfile, Product, SupportTicket, TicketResponse
 from middleware.auth import role_required
+from middleware.replica import read_replica
+from services.image_service import image_service, allowed_file
+from services.analytics_service import provider_analytics_service, GRANULARITIES
+from services.forecast_service import forecast_service
+from services.ticket_service import ticket_service
+from services.ticket_search_service import ticket_search_service
+from datetime import datetime, timedelta, timezone
 
 provider_bp = Blueprint('provider', __name__)
 
@@ -14,6 +21,7 @@ provider_bp = Blueprint('provider', __name__)
 
 @provider_bp.route('/profile', methods=['GET'])
 @role_required('provider')
+@read_replica
 def get_profile():
     """Get provider profile"""
     try:
@@ -108,6 +116,7 @@ def update_profile():
 
 @provider_bp.route('/products', methods=['GET'])
 @role_required('provider')
+@read_replica
 def get_products():
     """Get provider's products"""
     try:
@@ -173,6 +182,7 @@ def add_product():
 
 @provider_bp.route('/products/<int:product_id>', methods=['GET'])
 @role_required('provider')
+@read_replica
 def get_product(product_id):
     """Get product details"""
     try:
@@ -244,22 +254,108 @@ def delete_product(product_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@provider_bp.route('/products/<int:product_id>/image', methods=['POST'])
+@role_required('provider')
+def upload_product_image(product_id):
+    """Upload product image and queue thumbnail/WebP variants"""
+    try:
+        user_id = get_jwt_identity()
+        
+        product = Product.query.get(product_id)
+        
+        if not product or product.provider_id != user_id:
+            return jsonify({'error': 'Product not found'}), 404
+        
+        image = request.files.get('image')
+        if not image or not image.filename:
+            return jsonify({'error': 'image file is required'}), 400
+        
+        if not allowed_file(image.filename, current_app.config['ALLOWED_EXTENSIONS']):
+            return jsonify({'error': 'File type not allowed'}), 400
+        
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        
+        try:
+            digest, filename = image_service.store_original(image, upload_folder)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        variants = image_service.submit_variants(digest, filename, current_app.config)
+        
+        media_prefix = current_app.config['MEDIA_URL_PREFIX']
+        product.image_hash = digest
+        product.image_url = f"{media_prefix}/{filename}"
+        product.image_variants = {
+            name: f"{media_prefix}/{variant}" for name, variant in variants.items()
+        }
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Image uploaded successfully',
+            'product': product.to_dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # ============== SUPPORT TICKETS ==============
 
 @provider_bp.route('/tickets', methods=['GET'])
 @role_required('provider')
+@read_replica
 def get_tickets():
     """Get all open support tickets"""
     try:
-        tickets = SupportTicket.query.filter_by(status='open').all()
+        summary = request.args.get('summary', 'false').lower() == 'true'
         
-        tickets_data = []
-        for ticket in tickets:
-            ticket_dict = ticket.to_dict()
-            ticket_dict['responses'] = [r.to_dict() for r in ticket.responses]
-            tickets_data.append(ticket_dict)
+        tickets = ticket_service.serialize(
+            SupportTicket.query.filter_by(status='open').order_by(SupportTicket.id),
+            summary=summary
+        )
         
-        return jsonify({'tickets': tickets_data}), 200
+        return jsonify({'tickets': tickets}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@provider_bp.route('/tickets/search', methods=['GET'])
+@role_required('provider', 'admin')
+@read_replica
+def search_tickets():
+    """Full-text search over tickets and their responses, best match first"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+        
+        try:
+            page = int(request.args.get('page', 1))
+            limit = int(request.args['limit']) if request.args.get('limit') else None
+            start = datetime.fromisoformat(request.args['start_date']) if request.args.get('start_date') else None
+            end = datetime.fromisoformat(request.args['end_date']) if request.args.get('end_date') else None
+        except ValueError:
+            return jsonify({'error': 'page and limit must be integers, dates ISO dates (2026-01-31)'}), 400
+        
+        if page < 1 or (limit is not None and limit < 1):
+            return jsonify({'error': 'page and limit must be positive'}), 400
+        
+        # A bare end date means the whole day
+        if end and len(request.args['end_date']) <= 10:
+            end += timedelta(days=1)
+        
+        results = ticket_search_service.search(
+            query,
+            status=request.args.get('status'),
+            order_number=request.args.get('order_number'),
+            start=start,
+            end=end,
+            page=page,
+            limit=limit
+        )
+        
+        return jsonify(results), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -305,6 +401,7 @@ def respond_to_ticket(ticket_id):
 
 @provider_bp.route('/analytics', methods=['GET'])
 @role_required('provider')
+@read_replica
 def get_analytics():
     """Get provider analytics"""
     try:
@@ -326,3 +423,73 @@ def get_analytics():
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@provider_bp.route('/analytics/sales', methods=['GET'])
+@role_required('provider')
+@read_replica
+def get_sales_analytics():
+    """Get revenue, units, top products, sales series and stock-out risk"""
+    try:
+        user_id = get_jwt_identity()
+        
+        try:
+            # By default, through the end of today: every bucket is a day or
+            # longer, and a fixed boundary lets repeated requests share a
+            # cache entry
+            end = datetime.fromisoformat(request.args['end_date']) if request.args.get('end_date') \
+                else datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+            start = datetime.fromisoformat(request.args['start_date']) if request.args.get('start_date') \
+                else end - timedelta(days=30)
+        except ValueError:
+            return jsonify({'error': 'start_date and end_date must be ISO dates, e.g. 2026-01-31'}), 400
+        
+        # Orders are stored in naive UTC; a date with an offset is converted
+        # to it so it can be compared with a date without one
+        start, end = (
+            value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+            for value in (start, end)
+        )
+        
+        # A bare end date means the whole day
+        if request.args.get('end_date') and len(request.args['end_date']) <= 10:
+            end += timedelta(days=1)
+        
+        if start >= end:
+            return jsonify({'error': 'start_date must be before end_date'}), 400
+        
+        if (end - start).days > current_app.config['PROVIDER_ANALYTICS_MAX_DAYS']:
+            return jsonify({'error': 'Date range is too long'}), 400
+        
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in GRANULARITIES:
+            return jsonify({'error': f"granularity must be one of: {', '.join(GRANULARITIES)}"}), 400
+        
+        analytics = provider_analytics_service.sales(user_id, start, end, granularity)
+        
+        return jsonify({'analytics': analytics}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@provider_bp.route('/forecast', methods=['GET'])
+@role_required('provider')
+def get_demand_forecast():
+    """Get demand forecasts and restock alerts for provider's products"""
+    try:
+        user_id = get_jwt_identity()
+        alerts_only = request.args.get('alerts_only', 'false').lower() == 'true'
+        
+        forecasts = forecast_service.for_provider(user_id, alerts_only=alerts_only)
+        lead_time = current_app.config['FORECAST_LEAD_TIME_DAYS']
+        
+        return jsonify({
+            'forecasts': [f.to_dict() for f in forecasts],
+            'alerts': sum(
+                1 for f in forecasts
+                if f.days_until_stockout is not None and f.days_until_stockout <= lead_time
+            ),
+            'lead_time_days': lead_time
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
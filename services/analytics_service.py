@@ -0,0 +1,184 @@
+"""
+Provider sales analytics
+Aggregates completed order_items per provider in SQL: totals, top products,
+time-bucketed series and stock-out risk
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from models_sqlalchemy import db
+from models_sqlalchemy.models import Order, OrderItem, Product
+
+GRANULARITIES = ('day', 'week', 'month')
+
+SQLITE_BUCKET_FORMATS = {
+    'day': '%Y-%m-%d',
+    'month': '%Y-%m'
+}
+
+POSTGRES_BUCKET_FORMATS = {
+    'day': 'YYYY-MM-DD',
+    'week': 'IYYY-"W"IW',
+    'month': 'YYYY-MM'
+}
+
+def bucket_expression(column, granularity, dialect_name):
+    """SQL expression labelling a datetime column with its period"""
+    if dialect_name == 'postgresql':
+        return db.func.to_char(
+            db.func.date_trunc(granularity, column), POSTGRES_BUCKET_FORMATS[granularity]
+        )
+    if granularity == 'week':
+        # SQLite has no ISO week; the ISO year and week are those of the
+        # Thursday in the same Monday-based week, as Postgres's IYYY-IW
+        thursday = (column, '-3 days', 'weekday 4')
+        return db.func.printf(
+            '%s-W%02d',
+            db.func.strftime('%Y', *thursday),
+            (db.cast(db.func.strftime('%j', *thursday), db.Integer) - 1) // 7 + 1
+        )
+    return db.func.strftime(SQLITE_BUCKET_FORMATS[granularity], column)
+
+class ProviderAnalyticsService:
+    """Sales aggregates per provider with a short LRU + TTL cache"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+    def _sales_query(self, provider_id, start, end, *columns):
+        return db.session.query(*columns)\
+            .select_from(OrderItem)\
+            .join(Order, Order.id == OrderItem.order_id)\
+            .join(Product, Product.id == OrderItem.product_id)\
+            .filter(
+                Product.provider_id == provider_id,
+                Order.payment_status == 'completed',
+                Order.created_at >= start,
+                Order.created_at < end
+            )
+
+    def sales(self, provider_id, start, end, granularity='day', top_limit=10):
+        """
+        Sales analytics for a provider over [start, end)
+
+        Args:
+            provider_id: Provider user id
+            start: Period start (datetime)
+            end: Period end (datetime, exclusive)
+            granularity: day, week or month buckets for the series
+            top_limit: Number of top products to return
+
+        Returns:
+            dict: totals, series, top_products and stock_risk
+        """
+        key = (provider_id, start, end, granularity, top_limit)
+        config = current_app.config
+        ttl = config['PROVIDER_ANALYTICS_CACHE_SECONDS']
+        now = time.monotonic()
+
+        if ttl:
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached and cached[0] > now:
+                    self._cache.move_to_end(key)
+                    return cached[1]
+
+        result = self._compute(provider_id, start, end, granularity, top_limit)
+
+        if ttl:
+            with self._lock:
+                self._cache[key] = (now + ttl, result)
+                self._cache.move_to_end(key)
+                while len(self._cache) > config['PROVIDER_ANALYTICS_CACHE_SIZE']:
+                    self._cache.popitem(last=False)
+
+        return result
+
+    def _compute(self, provider_id, start, end, granularity, top_limit):
+        revenue = db.func.coalesce(db.func.sum(OrderItem.quantity * OrderItem.price), 0)
+        units = db.func.coalesce(db.func.sum(OrderItem.quantity), 0)
+        orders = db.func.count(db.distinct(Order.id))
+
+        totals = self._sales_query(provider_id, start, end, revenue, units, orders).one()
+
+        bucket = bucket_expression(Order.created_at, granularity, db.engine.dialect.name)\
+            .label('period')
+        series = self._sales_query(provider_id, start, end, bucket, revenue, units, orders)\
+            .group_by(bucket).order_by(bucket).all()
+
+        top_products = self._sales_query(
+            provider_id, start, end, Product.id, Product.name, revenue.label('revenue'), units
+        ).group_by(Product.id, Product.name)\
+            .order_by(db.desc('revenue')).limit(top_limit).all()
+
+        return {
+            'period': {
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+                'granularity': granularity
+            },
+            'totals': {
+                'revenue': float(totals[0]),
+                'units_sold': int(totals[1]),
+                'orders': int(totals[2])
+            },
+            'series': [
+                {
+                    'period': row[0],
+                    'revenue': float(row[1]),
+                    'units_sold': int(row[2]),
+                    'orders': int(row[3])
+                }
+                for row in series
+            ],
+            'top_products': [
+                {
+                    'product_id': row[0],
+                    'name': row[1],
+                    'revenue': float(row[2]),
+                    'units_sold': int(row[3])
+                }
+                for row in top_products
+            ],
+            'stock_risk': self._stock_risk(provider_id)
+        }
+
+    def _stock_risk(self, provider_id):
+        """Active products whose recent sales rate empties stock soon"""
+        window_days = current_app.config['STOCK_RISK_WINDOW_DAYS']
+        horizon_days = current_app.config['STOCK_RISK_HORIZON_DAYS']
+        now = datetime.utcnow()
+
+        recent = self._sales_query(
+            provider_id, now - timedelta(days=window_days), now,
+            OrderItem.product_id.label('product_id'),
+            db.func.sum(OrderItem.quantity).label('units')
+        ).group_by(OrderItem.product_id).subquery()
+
+        rows = db.session.query(
+            Product.id, Product.name, Product.stock_quantity, recent.c.units
+        ).join(recent, recent.c.product_id == Product.id)\
+            .filter(Product.provider_id == provider_id, Product.is_active == True).all()
+
+        at_risk = []
+        for product_id, name, stock, units in rows:
+            per_day = units / window_days
+            days_left = (stock or 0) / per_day
+            if days_left <= horizon_days:
+                at_risk.append({
+                    'product_id': product_id,
+                    'name': name,
+                    'stock_quantity': stock or 0,
+                    'units_per_day': round(per_day, 2),
+                    'days_of_stock': round(days_left, 1)
+                })
+
+        return sorted(at_risk, key=lambda item: item['days_of_stock'])
+
+# Singleton instance
+provider_analytics_service = ProviderAnalyticsService()
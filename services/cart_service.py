@@ -0,0 +1,185 @@
+"""
+Cart read path and pricing
+Loads cart lines joined to their products in one query and prices them
+with the same rules checkout uses
+"""
+
+from flask import current_app
+from sqlalchemy import insert, update
+from models_sqlalchemy import db
+from models_sqlalchemy.models import CartItem, Product
+
+class CartService:
+    """Cart loading and order pricing"""
+
+    @staticmethod
+    def calculate_totals(subtotal):
+        """
+        Price a cart subtotal
+
+        Args:
+            subtotal: Sum of line price * quantity
+
+        Returns:
+            dict: subtotal, shipping, tax and total
+        """
+        shipping = current_app.config['SHIPPING_FEE']
+        tax = subtotal * current_app.config['TAX_RATE']
+
+        return {
+            'subtotal': subtotal,
+            'shipping': shipping,
+            'tax': tax,
+            'total': subtotal + shipping + tax
+        }
+
+    def get_cart(self, customer_id):
+        """
+        Load a customer's cart with product fields and totals
+
+        Args:
+            customer_id: Cart owner
+
+        Returns:
+            dict: items (CartItem.to_dict shape plus availability), item_count
+                  and the calculate_totals fields
+        """
+        rows = db.session.query(
+            CartItem.id,
+            CartItem.customer_id,
+            CartItem.product_id,
+            CartItem.quantity,
+            Product.name,
+            Product.price,
+            Product.image_url,
+            Product.stock_quantity,
+            Product.is_active,
+            Product.is_approved
+        ).outerjoin(Product, Product.id == CartItem.product_id)\
+            .filter(CartItem.customer_id == customer_id)\
+            .order_by(CartItem.id).all()
+
+        items = []
+        subtotal = 0
+
+        for row in rows:
+            price = float(row.price) if row.price is not None else 0
+            items.append({
+                'id': row.id,
+                'customer_id': row.customer_id,
+                'product_id': row.product_id,
+                'quantity': row.quantity,
+                'name': row.name,
+                'price': price,
+                'image_url': row.image_url,
+                'stock_quantity': row.stock_quantity or 0,
+                'is_available': bool(row.name is not None and row.is_active and row.is_approved)
+            })
+            subtotal += price * row.quantity
+
+        cart = {'items': items, 'item_count': len(items)}
+        cart.update(self.calculate_totals(subtotal))
+        return cart
+
+    def sync_cart(self, customer_id, items, replace=True):
+        """
+        Apply a batch of cart changes in one transaction
+
+        Args:
+            customer_id: Cart owner
+            items: List of {'product_id', 'quantity'} with integer values;
+                   quantity 0 removes the line
+            replace: True if items is the full desired cart, False for a diff
+
+        Returns:
+            dict: The recomputed cart (see get_cart)
+
+        Raises:
+            ValueError: If the payload is malformed or a product fails validation
+        """
+        changes = {}
+        for entry in items:
+            if not isinstance(entry, dict):
+                raise ValueError('Each item must be an object with product_id and quantity')
+            product_id = entry.get('product_id')
+            quantity = entry.get('quantity', 1)
+            if not all(isinstance(value, int) and not isinstance(value, bool)
+                       for value in (product_id, quantity)):
+                raise ValueError('Each item needs an integer product_id and quantity')
+            if product_id <= 0:
+                raise ValueError('product_id must be positive')
+            if quantity < 0:
+                raise ValueError('quantity cannot be negative')
+            changes[product_id] = quantity
+
+        # Lines by product; concurrent adds can leave several rows for one
+        # product, which collapse into the oldest with their quantities summed
+        existing = {}
+        duplicates = []
+        for row in db.session.query(CartItem.id, CartItem.product_id, CartItem.quantity)\
+                .filter(CartItem.customer_id == customer_id).order_by(CartItem.id):
+            line = existing.get(row.product_id)
+            if line is None:
+                existing[row.product_id] = {'id': row.id, 'stored': row.quantity, 'quantity': row.quantity}
+            else:
+                line['quantity'] += row.quantity
+                duplicates.append(row.id)
+
+        desired = {} if replace else {pid: line['quantity'] for pid, line in existing.items()}
+        desired.update(changes)
+        desired = {pid: qty for pid, qty in desired.items() if qty > 0}
+
+        if len(desired) > current_app.config['MAX_CART_ITEMS']:
+            raise ValueError(f"Cart cannot hold more than {current_app.config['MAX_CART_ITEMS']} items")
+
+        # Validate every product being added or changed in one IN query
+        to_check = [pid for pid, qty in desired.items()
+                    if pid not in existing or existing[pid]['quantity'] != qty]
+        if to_check:
+            products = {
+                row.id: row
+                for row in db.session.query(
+                    Product.id, Product.name, Product.stock_quantity,
+                    Product.is_active, Product.is_approved
+                ).filter(Product.id.in_(to_check)).all()
+            }
+            for pid in to_check:
+                product = products.get(pid)
+                if not product or not product.is_active or not product.is_approved:
+                    raise ValueError(f'Product {pid} not available')
+                if (product.stock_quantity or 0) < desired[pid]:
+                    raise ValueError(f'Insufficient stock for {product.name}')
+
+        removed = [pid for pid in existing if pid not in desired]
+        updated = [
+            {'id': existing[pid]['id'], 'quantity': qty}
+            for pid, qty in desired.items()
+            if pid in existing and existing[pid]['stored'] != qty
+        ]
+        added = [
+            {'customer_id': customer_id, 'product_id': pid, 'quantity': qty}
+            for pid, qty in desired.items() if pid not in existing
+        ]
+
+        try:
+            if removed:
+                CartItem.query.filter(
+                    CartItem.customer_id == customer_id,
+                    CartItem.product_id.in_(removed)
+                ).delete(synchronize_session=False)
+            if duplicates:
+                CartItem.query.filter(CartItem.id.in_(duplicates))\
+                    .delete(synchronize_session=False)
+            if updated:
+                db.session.execute(update(CartItem), updated)
+            if added:
+                db.session.execute(insert(CartItem), added)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return self.get_cart(customer_id)
+
+# Singleton instance
+cart_service = CartService()
@@ -0,0 +1,693 @@
+"""
+Storefront catalogue service
+Parses browse filters into SQL conditions and computes facet counts
+(price and wattage bands, panel type, provider, stock) in one grouped
+query, cached per filter signature. Optionally serves browse entirely from
+an in-process columnar snapshot of sellable products.
+"""
+
+import base64
+import bisect
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import String, case, cast, literal, select, tuple_, union_all
+
+from models_sqlalchemy import db
+from models_sqlalchemy.models import Product, ProviderProfile
+
+FACETS = ('price', 'wattage', 'panel_type', 'provider', 'in_stock')
+
+SORTS = ('price_asc', 'price_desc', 'newest', 'wattage', 'popularity')
+
+# Descending sorts break ties by descending id so (value, id) keeps one
+# direction and keyset pages can walk a single composite index
+DESCENDING_SORTS = ('price_desc', 'newest', 'wattage', 'popularity')
+
+# Facet value for products with no panel type or wattage
+UNKNOWN = 'unknown'
+
+def _csv(value, convert=str):
+    items = [item.strip() for item in value.split(',') if item.strip()] if value else []
+    return tuple(sorted({convert(item) for item in items}))
+
+def parse_browse_filters(args):
+    """
+    Normalize browse query parameters
+
+    Raises:
+        ValueError: if a parameter has the wrong type
+
+    Returns:
+        dict: search, min_price, max_price, min_wattage, max_wattage,
+              price_band, wattage_band, panel_type and provider_id (tuples
+              of facet values), in_stock (bool or None)
+    """
+    config = current_app.config
+
+    def number(name, convert):
+        value = args.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            return convert(value)
+        except ValueError:
+            raise ValueError(f'{name} must be a number')
+
+    in_stock = args.get('in_stock')
+    if in_stock not in (None, '', 'true', 'false'):
+        raise ValueError('in_stock must be true or false')
+
+    try:
+        provider_ids = _csv(args.get('provider_id'), int)
+    except ValueError:
+        raise ValueError('provider_id must be a comma-separated list of ids')
+
+    def bands(name, edges, labels=()):
+        labels = (*band_labels(edges), *labels)
+        values = _csv(args.get(name))
+        if any(value not in labels for value in values):
+            raise ValueError(f"{name} must be a comma-separated list of: {', '.join(labels)}")
+        return values
+
+    return {
+        'search': args.get('search', '').strip().lower(),
+        'min_price': number('min_price', float),
+        'max_price': number('max_price', float),
+        'min_wattage': number('min_wattage', int),
+        'max_wattage': number('max_wattage', int),
+        'price_band': bands('price_band', config['CATALOGUE_PRICE_BANDS']),
+        'wattage_band': bands('wattage_band', config['CATALOGUE_WATTAGE_BANDS'], (UNKNOWN,)),
+        'panel_type': _csv(args.get('panel_type')),
+        'provider_id': provider_ids,
+        'in_stock': None if in_stock in (None, '') else in_stock == 'true'
+    }
+
+def panel_type_value(panel_type):
+    """Panel type as faceted: None and '' are both UNKNOWN"""
+    return panel_type or UNKNOWN
+
+def panel_type_expression():
+    """SQL form of panel_type_value"""
+    return db.func.coalesce(db.func.nullif(Product.solar_panel_type, ''), UNKNOWN)
+
+def band_condition(column, bands, edges):
+    """Rows whose column falls in any of the named bands (see band_labels)"""
+    labels = band_labels(edges)
+    conditions = []
+    for band in bands:
+        if band == UNKNOWN:
+            conditions.append(column == None)
+            continue
+        i = labels.index(band)
+        bounds = []
+        if i > 0:
+            bounds.append(column >= edges[i - 1])
+        if i < len(edges):
+            bounds.append(column < edges[i])
+        conditions.append(db.and_(*bounds))
+    return db.or_(*conditions)
+
+def filter_conditions(filters, exclude=None):
+    """
+    SQL conditions for browse filters on approved, active products
+
+    Args:
+        filters: Output of parse_browse_filters
+        exclude: Facet whose own filters are left out, so its counts show
+                 what selecting another value would return
+    """
+    conditions = [Product.is_active == True, Product.is_approved == True]
+
+    search = filters['search']
+    if search:
+        # A literal substring, as the memory engine matches it
+        pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        conditions.append(db.or_(
+            Product.name.ilike(pattern, escape='\\'),
+            Product.description.ilike(pattern, escape='\\')
+        ))
+
+    config = current_app.config
+
+    if exclude != 'price':
+        if filters['min_price'] is not None:
+            conditions.append(Product.price >= filters['min_price'])
+        if filters['max_price'] is not None:
+            conditions.append(Product.price <= filters['max_price'])
+        if filters['price_band']:
+            conditions.append(band_condition(
+                Product.price, filters['price_band'], config['CATALOGUE_PRICE_BANDS']
+            ))
+
+    if exclude != 'wattage':
+        if filters['min_wattage'] is not None:
+            conditions.append(Product.wattage >= filters['min_wattage'])
+        if filters['max_wattage'] is not None:
+            conditions.append(Product.wattage <= filters['max_wattage'])
+        if filters['wattage_band']:
+            conditions.append(band_condition(
+                Product.wattage, filters['wattage_band'], config['CATALOGUE_WATTAGE_BANDS']
+            ))
+
+    if exclude != 'panel_type' and filters['panel_type']:
+        panel_type = Product.solar_panel_type.in_(filters['panel_type'])
+        if UNKNOWN in filters['panel_type']:
+            panel_type = db.or_(panel_type, Product.solar_panel_type == None, Product.solar_panel_type == '')
+        conditions.append(panel_type)
+
+    if exclude != 'provider' and filters['provider_id']:
+        conditions.append(Product.provider_id.in_(filters['provider_id']))
+
+    if exclude != 'in_stock' and filters['in_stock'] is not None:
+        if filters['in_stock']:
+            conditions.append(Product.stock_quantity > 0)
+        else:
+            conditions.append(db.func.coalesce(Product.stock_quantity, 0) <= 0)
+
+    return conditions
+
+def encode_cursor(sort, value, product_id):
+    """Opaque keyset cursor for the row after which the next page starts"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, product_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, sort):
+    """
+    Decode a cursor made by encode_cursor for the same sort
+
+    Raises:
+        ValueError: if the cursor is malformed or belongs to another sort
+
+    Returns:
+        (value, product_id)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, product_id = json.loads(raw)
+        if sort == 'newest':
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+    if cursor_sort != sort or not isinstance(product_id, int):
+        raise ValueError('Invalid cursor')
+    return value, product_id
+
+def browse_page(filters, sort=None, cursor=None, limit=None):
+    """
+    Products matching browse filters in sort order, optionally one keyset page
+
+    Args:
+        filters: Output of parse_browse_filters
+        sort: One of SORTS, or None for no particular order
+        cursor: (value, product_id) from decode_cursor
+        limit: Page size; None returns every match
+
+    Returns:
+        (products, next_cursor, total): next_cursor is None on the last page;
+        total counts every match, not just this page
+    """
+    query = db.session.query(Product).filter(*filter_conditions(filters))
+    if not sort:
+        products = query.all()
+        return products, None, len(products)
+
+    key = {
+        'price_asc': Product.price,
+        'price_desc': Product.price,
+        'newest': Product.created_at,
+        'wattage': Product.wattage,
+        'popularity': Product.units_sold
+    }[sort]
+
+    descending = sort in DESCENDING_SORTS
+    query = query.add_columns(key.label('sort_value'))
+    if not descending:
+        query = query.order_by(key.asc(), Product.id.asc())
+    elif sort == 'wattage':
+        query = query.order_by(key.desc().nullslast(), Product.id.desc())
+    else:
+        query = query.order_by(key.desc(), Product.id.desc())
+
+    if cursor is not None:
+        value, last_id = cursor
+        if value is None:
+            # Only wattage has NULLs; the cursor is already in that tail
+            query = query.filter(key.is_(None), Product.id < last_id)
+        elif not descending:
+            query = query.filter(tuple_(key, Product.id) > (value, last_id))
+        elif sort == 'wattage':
+            query = query.filter(db.or_(tuple_(key, Product.id) < (value, last_id), key.is_(None)))
+        else:
+            query = query.filter(tuple_(key, Product.id) < (value, last_id))
+
+    if limit is None:
+        products = [row[0] for row in query.all()]
+        return products, None, len(products)
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(sort, last.sort_value, last[0].id)
+    total = db.session.query(db.func.count(Product.id)).filter(*filter_conditions(filters)).scalar()
+    return [row[0] for row in rows[:limit]], next_cursor, total
+
+def band_labels(edges):
+    """Labels for the bands between ascending edges, e.g. '0-1000' ... '20000+'"""
+    bounds = (0, *edges)
+    labels = [f'{low:g}-{high:g}' for low, high in zip(bounds, edges)]
+    return labels + [f'{edges[-1]:g}+']
+
+def band_expression(column, edges):
+    labels = band_labels(edges)
+    return case(
+        *((column < edge, label) for edge, label in zip(edges, labels)),
+        else_=labels[-1]
+    )
+
+def order_facets(facets, config):
+    """Bands keep their natural order; other facets list the most common first"""
+    for name, edges in (('price', config['CATALOGUE_PRICE_BANDS']),
+                        ('wattage', config['CATALOGUE_WATTAGE_BANDS'])):
+        order = {label: i for i, label in enumerate(band_labels(edges) + [UNKNOWN])}
+        facets[name].sort(key=lambda item: order.get(item['value'], len(order)))
+    for name in ('panel_type', 'provider', 'in_stock'):
+        facets[name].sort(key=lambda item: (-item['count'], str(item['label'])))
+    return facets
+
+class FacetService:
+    """Facet counts for the browse API, cached per filter signature"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+    def _query(self, filters):
+        config = current_app.config
+        count = db.func.count(Product.id).label('count')
+
+        def grouped(facet, value, label=None, join=None):
+            value = cast(value, String).label('value')
+            label = (cast(label, String) if label is not None else value).label('label')
+            query = select(literal(facet).label('facet'), value, label, count).select_from(Product)
+            if join is not None:
+                query = query.outerjoin(*join)
+            return query.where(*filter_conditions(filters, exclude=facet)).group_by(value, label)
+
+        wattage_band = case(
+            (Product.wattage == None, UNKNOWN),
+            else_=band_expression(Product.wattage, config['CATALOGUE_WATTAGE_BANDS'])
+        )
+
+        return union_all(
+            grouped('price', band_expression(Product.price, config['CATALOGUE_PRICE_BANDS'])),
+            grouped('wattage', wattage_band),
+            grouped('panel_type', panel_type_expression()),
+            grouped('provider', Product.provider_id, ProviderProfile.business_name,
+                    join=(ProviderProfile, ProviderProfile.user_id == Product.provider_id)),
+            grouped('in_stock', case((Product.stock_quantity > 0, 'true'), else_='false'))
+        )
+
+    def _compute(self, filters):
+        facets = {name: [] for name in FACETS}
+
+        for row in db.session.execute(self._query(filters)):
+            value = int(row.value) if row.facet == 'provider' else row.value
+            facets[row.facet].append({'value': value, 'label': row.label, 'count': row.count})
+
+        return order_facets(facets, current_app.config)
+
+    def facets(self, filters):
+        """
+        Facet counts for a filter set
+
+        Returns:
+            dict: facet name -> list of {value, label, count}
+        """
+        config = current_app.config
+        key = tuple(sorted(filters.items()))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > now:
+                self._cache.move_to_end(key)
+                return entry[1]
+
+        facets = self._compute(filters)
+
+        with self._lock:
+            self._cache[key] = (now + config['CATALOGUE_FACET_CACHE_SECONDS'], facets)
+            self._cache.move_to_end(key)
+            while len(self._cache) > config['CATALOGUE_FACET_CACHE_SIZE']:
+                self._cache.popitem(last=False)
+
+        return facets
+
+# Singleton instance
+facet_service = FacetService()
+
+def _encode(value):
+    return json.dumps(value, sort_keys=True, separators=(',', ':')).encode()
+
+class CatalogueSnapshot:
+    """Sellable products as parallel NumPy columns plus pre-encoded JSON payloads"""
+
+    def __init__(self, records, provider_names, watermark):
+        records = sorted(records, key=lambda record: record[0])
+        count = len(records)
+        columns = list(zip(*records)) if records else [()] * 10
+
+        self.ids = np.array(columns[0], dtype=np.int64)
+        self.price = np.array(columns[1], dtype=np.float64)
+        self.wattage = np.array(columns[2], dtype=np.float64)
+        self.stock = np.array(columns[3], dtype=np.int64)
+        self.units_sold = np.array(columns[4], dtype=np.int64)
+        self.provider_id = np.array(columns[5], dtype=np.int64)
+        self.panel_type = np.array(columns[6], dtype=str) if count else np.array([], dtype=str)
+        self.created_at = np.array(columns[7], dtype='datetime64[us]')
+        self.texts = columns[8]
+        self.payloads = np.empty(count, dtype=object)
+        self.payloads[:] = columns[9]
+
+        # Substring search runs str.find over one blob instead of per row
+        self.blob = '\0'.join(self.texts)
+        lengths = np.fromiter((len(text) + 1 for text in self.texts), dtype=np.int64, count=count)
+        self.offsets = (np.cumsum(lengths) - lengths).tolist()
+
+        self.provider_names = provider_names
+        self.watermark = watermark
+
+    @staticmethod
+    def record(product):
+        """Snapshot row for a Product"""
+        return (
+            product.id,
+            product.price,
+            np.nan if product.wattage is None else product.wattage,
+            product.stock_quantity or 0,
+            product.units_sold or 0,
+            product.provider_id,
+            panel_type_value(product.solar_panel_type),
+            product.created_at or datetime.min,
+            f"{product.name}\n{product.description or ''}".lower(),
+            _encode(product.to_dict())
+        )
+
+    def records(self, keep):
+        """Rows of this snapshot (as from record) where keep is True"""
+        return [
+            (int(self.ids[i]), float(self.price[i]), float(self.wattage[i]), int(self.stock[i]),
+             int(self.units_sold[i]), int(self.provider_id[i]), str(self.panel_type[i]), self.created_at[i].item(),
+             self.texts[i], self.payloads[i])
+            for i in np.flatnonzero(keep)
+        ]
+
+    def payload(self, product_id):
+        """Encoded product for an id, or None if it is not in the snapshot"""
+        i = int(np.searchsorted(self.ids, product_id))
+        if i < len(self.ids) and self.ids[i] == product_id:
+            return self.payloads[i]
+        return None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _text_mask(self, needle):
+        mask = np.zeros(len(self.ids), dtype=bool)
+        blob, offsets = self.blob, self.offsets
+        position = blob.find(needle)
+        while position != -1:
+            row = bisect.bisect_right(offsets, position) - 1
+            mask[row] = True
+            if row + 1 >= len(offsets):
+                break
+            position = blob.find(needle, offsets[row + 1])
+        return mask
+
+    @staticmethod
+    def _band_mask(column, bands, edges):
+        # Same bands as band_condition; NaN is the unknown band
+        labels = band_labels(edges)
+        unknown = np.isnan(column)
+        selected = [labels.index(band) for band in bands if band != UNKNOWN]
+        mask = np.isin(np.searchsorted(edges, column, side='right'), selected) & ~unknown
+        if UNKNOWN in bands:
+            mask |= unknown
+        return mask
+
+    def _masks(self, filters, config):
+        everything = np.ones(len(self.ids), dtype=bool)
+        masks = dict.fromkeys(FACETS, everything)
+        base = self._text_mask(filters['search']) if filters['search'] else everything
+
+        if filters['min_price'] is not None or filters['max_price'] is not None:
+            low = -np.inf if filters['min_price'] is None else filters['min_price']
+            high = np.inf if filters['max_price'] is None else filters['max_price']
+            masks['price'] = (self.price >= low) & (self.price <= high)
+
+        if filters['min_wattage'] is not None or filters['max_wattage'] is not None:
+            low = -np.inf if filters['min_wattage'] is None else filters['min_wattage']
+            high = np.inf if filters['max_wattage'] is None else filters['max_wattage']
+            masks['wattage'] = (self.wattage >= low) & (self.wattage <= high)
+
+        if filters['price_band']:
+            masks['price'] = masks['price'] & self._band_mask(
+                self.price, filters['price_band'], config['CATALOGUE_PRICE_BANDS'])
+
+        if filters['wattage_band']:
+            masks['wattage'] = masks['wattage'] & self._band_mask(
+                self.wattage, filters['wattage_band'], config['CATALOGUE_WATTAGE_BANDS'])
+
+        # Unknown panel types are stored as UNKNOWN, so this matches them too
+        if filters['panel_type']:
+            masks['panel_type'] = np.isin(self.panel_type, filters['panel_type'])
+
+        if filters['provider_id']:
+            masks['provider'] = np.isin(self.provider_id, filters['provider_id'])
+
+        if filters['in_stock'] is not None:
+            masks['in_stock'] = (self.stock > 0) == filters['in_stock']
+
+        return base, masks
+
+    def _sort_key(self, sort):
+        # Ascending key whose order matches browse_page's ORDER BY
+        if sort == 'price_asc':
+            return self.price
+        if sort == 'price_desc':
+            return -self.price
+        if sort == 'newest':
+            return -self.created_at.astype(np.int64)
+        if sort == 'popularity':
+            return -self.units_sold
+        return np.where(np.isnan(self.wattage), np.inf, -self.wattage)
+
+    def _after(self, sort, cursor):
+        value, last_id = cursor
+        ids = self.ids if sort == 'price_asc' else -self.ids
+        last_id = last_id if sort == 'price_asc' else -last_id
+
+        if sort == 'newest':
+            value = -np.datetime64(value, 'us').astype(np.int64)
+        elif sort == 'wattage':
+            value = np.inf if value is None else -value
+        elif sort in ('price_desc', 'popularity'):
+            value = -value
+
+        key = self._sort_key(sort)
+        return (key > value) | ((key == value) & (ids > last_id))
+
+    def cursor_value(self, sort, row):
+        if sort == 'newest':
+            return self.created_at[row].item()
+        if sort == 'wattage':
+            return None if np.isnan(self.wattage[row]) else int(self.wattage[row])
+        if sort == 'popularity':
+            return int(self.units_sold[row])
+        return float(self.price[row])
+
+    def select(self, filters, sort=None, cursor=None):
+        """
+        Indices of matching rows in sort order (after cursor, if given), the
+        number of matches ignoring the cursor, and the per-facet masks
+        """
+        base, masks = self._masks(filters, current_app.config)
+        mask = base.copy()
+        for facet_mask in masks.values():
+            mask &= facet_mask
+        total = int(np.count_nonzero(mask))
+        if cursor is not None:
+            mask &= self._after(sort, cursor)
+
+        rows = np.flatnonzero(mask)
+        if sort:
+            ids = self.ids[rows] if sort == 'price_asc' else -self.ids[rows]
+            rows = rows[np.lexsort((ids, self._sort_key(sort)[rows]))]
+
+        return rows, total, base, masks
+
+    def facets(self, base, masks, config):
+        """Facet counts matching FacetService, each ignoring its own filter"""
+        def without(facet):
+            mask = base.copy()
+            for name, facet_mask in masks.items():
+                if name != facet:
+                    mask &= facet_mask
+            return mask
+
+        facets = {name: [] for name in FACETS}
+
+        for name, column, edges in (
+            ('price', self.price, config['CATALOGUE_PRICE_BANDS']),
+            ('wattage', self.wattage, config['CATALOGUE_WATTAGE_BANDS'])
+        ):
+            values = column[without(name)]
+            labels = band_labels(edges)
+            known = ~np.isnan(values)
+            counts = np.bincount(np.searchsorted(edges, values[known], side='right'),
+                                 minlength=len(labels))
+            facets[name] = [
+                {'value': label, 'label': label, 'count': int(count)}
+                for label, count in zip(labels, counts) if count
+            ]
+            if (~known).any():
+                facets[name].append({'value': UNKNOWN, 'label': UNKNOWN, 'count': int((~known).sum())})
+
+        panels, counts = np.unique(self.panel_type[without('panel_type')], return_counts=True)
+        facets['panel_type'] = [
+            {'value': panel, 'label': panel, 'count': int(count)}
+            for panel, count in zip(panels.tolist(), counts)
+        ]
+
+        providers, counts = np.unique(self.provider_id[without('provider')], return_counts=True)
+        facets['provider'] = [
+            {'value': provider, 'label': self.provider_names.get(provider), 'count': int(count)}
+            for provider, count in zip(providers.tolist(), counts)
+        ]
+
+        in_stock = self.stock[without('in_stock')] > 0
+        facets['in_stock'] = [
+            {'value': value, 'label': value, 'count': int(count)}
+            for value, count in (('true', in_stock.sum()), ('false', (~in_stock).sum())) if count
+        ]
+
+        return order_facets(facets, config)
+
+class CatalogueEngine:
+    """Keeps a CatalogueSnapshot fresh from an updated_at watermark and serves browse from it"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0
+        self._loaded_at = 0
+
+    def _provider_names(self):
+        return dict(db.session.query(ProviderProfile.user_id, ProviderProfile.business_name).all())
+
+    def _full_reload(self, now):
+        watermark = db.session.query(db.func.max(Product.updated_at)).scalar()
+        products = Product.query.filter(Product.is_active == True, Product.is_approved == True).all()
+        self._snapshot = CatalogueSnapshot(
+            [CatalogueSnapshot.record(p) for p in products], self._provider_names(), watermark
+        )
+        self._loaded_at = self._checked_at = now
+
+    def _refresh(self, now):
+        config = current_app.config
+        snapshot = self._snapshot
+
+        if snapshot.watermark is None or now - self._loaded_at >= config['CATALOGUE_FULL_REFRESH_SECONDS']:
+            self._full_reload(now)
+            return
+
+        # Commits can land out of updated_at order, so look back past the
+        # watermark; rows already applied come back and are skipped below
+        since = snapshot.watermark - timedelta(seconds=config['CATALOGUE_LOOKBACK_SECONDS'])
+        changed = Product.query.filter(Product.updated_at >= since).all()
+        if changed:
+            fresh = {
+                p.id: CatalogueSnapshot.record(p) if p.is_active and p.is_approved else None
+                for p in changed
+            }
+            watermark = max([snapshot.watermark, *(p.updated_at for p in changed if p.updated_at)])
+            if any(snapshot.payload(product_id) != (record[9] if record else None)
+                   for product_id, record in fresh.items()):
+                records = snapshot.records(~np.isin(snapshot.ids, list(fresh)))
+                records += [record for record in fresh.values() if record]
+                snapshot = CatalogueSnapshot(records, self._provider_names(), watermark)
+            else:
+                snapshot.watermark = watermark
+
+        # Deletes leave no updated_at behind; a count mismatch reveals them
+        sellable = db.session.query(db.func.count(Product.id))\
+            .filter(Product.is_active == True, Product.is_approved == True).scalar()
+        if sellable != len(snapshot):
+            self._full_reload(now)
+            return
+
+        self._snapshot = snapshot
+        self._checked_at = now
+
+    def snapshot(self):
+        """Current snapshot, refreshed at most every CATALOGUE_REFRESH_SECONDS"""
+        now = time.monotonic()
+        if self._snapshot is not None and \
+                now - self._checked_at < current_app.config['CATALOGUE_REFRESH_SECONDS']:
+            return self._snapshot
+
+        if self._snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._full_reload(now)
+        elif self._lock.acquire(blocking=False):
+            # One request refreshes; the rest keep serving the previous snapshot
+            try:
+                self._refresh(now)
+            finally:
+                self._lock.release()
+
+        return self._snapshot
+
+    def browse(self, filters, sort=None, with_facets=True, cursor=None, limit=None):
+        """
+        Browse response body, built without touching the database
+
+        Returns:
+            bytes: JSON with products, total (every match, not just this
+                   page), optionally facets and, when paging with limit,
+                   next_cursor
+        """
+        snapshot = self.snapshot()
+        rows, total, base, masks = snapshot.select(filters, sort, cursor)
+
+        extra = {}
+        if limit is not None:
+            extra['next_cursor'] = None
+            if len(rows) > limit:
+                last = rows[limit - 1]
+                extra['next_cursor'] = encode_cursor(
+                    sort, snapshot.cursor_value(sort, last), int(snapshot.ids[last])
+                )
+            rows = rows[:limit]
+        if with_facets:
+            extra['facets'] = snapshot.facets(base, masks, current_app.config)
+
+        body = b'{"products":[' + b','.join(snapshot.payloads[rows]) + b'],"total":' + \
+            str(total).encode()
+        for name, value in extra.items():
+            body += b',"' + name.encode() + b'":' + _encode(value)
+        return body + b'}'
+
+# Singleton instance
+catalogue_engine = CatalogueEngine()
@@ -0,0 +1,185 @@
+"""
+Customer event stream
+Server-Sent Events for order status changes and ticket replies. Commits
+wake the affected customers' streams in this process, and each woken
+stream reads its own changes from the database; with
+EVENT_STREAM_POLL_SECONDS set, streams also poll for commits made by
+other workers.
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event, select
+
+from models_sqlalchemy import db
+from models_sqlalchemy.models import Order, SupportTicket, TicketResponse
+
+def format_event(name, event_id, data):
+    """One SSE message"""
+    return f"id: {event_id}\nevent: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def notify_after_commit(session, customer_ids):
+    """Wake these customers' streams once the session's transaction commits"""
+    session.info.setdefault('event_stream_customers', set()).update(customer_ids)
+
+class EventStreamService:
+    """In-process fan-out of change notifications to customer streams"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._polled_at = 0
+        self._watermark = None
+
+    def subscribe(self, customer_id):
+        wake = threading.Event()
+        with self._lock:
+            self._subscribers[customer_id].add(wake)
+            if self._watermark is None:
+                self._watermark = datetime.utcnow()
+        return wake
+
+    def unsubscribe(self, customer_id, wake):
+        with self._lock:
+            self._subscribers[customer_id].discard(wake)
+            if not self._subscribers[customer_id]:
+                del self._subscribers[customer_id]
+
+    def publish(self, customer_ids):
+        with self._lock:
+            wakes = [wake for customer_id in customer_ids for wake in self._subscribers.get(customer_id, ())]
+        for wake in wakes:
+            wake.set()
+
+    def poll(self):
+        """
+        Wake streams whose customers changed in another worker
+
+        One query pair per interval for the whole process, limited to the
+        customers connected here; the first stream to time out runs it
+        """
+        config = current_app.config
+        now = time.monotonic()
+        with self._lock:
+            if now - self._polled_at < config['EVENT_STREAM_POLL_SECONDS']:
+                return
+            self._polled_at = now
+            customer_ids = list(self._subscribers)
+            watermark = self._watermark
+
+        started = datetime.utcnow()
+        if not customer_ids:
+            self._watermark = started
+            return
+
+        since = watermark - timedelta(seconds=config['EVENT_STREAM_LOOKBACK_SECONDS'])
+        changed = set(db.session.execute(
+            select(Order.customer_id).distinct()
+            .where(Order.customer_id.in_(customer_ids), Order.updated_at >= since)
+        ).scalars())
+        changed.update(db.session.execute(
+            select(SupportTicket.customer_id).distinct()
+            .join(TicketResponse, TicketResponse.ticket_id == SupportTicket.id)
+            .where(SupportTicket.customer_id.in_(customer_ids), TicketResponse.created_at >= since)
+        ).scalars())
+        self._watermark = started
+        self.publish(changed)
+
+    def changes(self, customer_id, since):
+        """
+        (timestamp, key, event name, data) for a customer's orders updated
+        and ticket responses posted at or after since, oldest first
+        """
+        found = [
+            (order.updated_at, ('order', order.id, order.updated_at), 'order',
+             dict(order.to_dict(), updated_at=order.updated_at.isoformat()))
+            for order in Order.query.filter(Order.customer_id == customer_id, Order.updated_at >= since)
+        ]
+        found += [
+            (response.created_at, ('ticket_response', response.id), 'ticket_response', response.to_dict())
+            for response in TicketResponse.query
+            .options(db.joinedload(TicketResponse.responder))
+            .join(SupportTicket, SupportTicket.id == TicketResponse.ticket_id)
+            .filter(SupportTicket.customer_id == customer_id, TicketResponse.created_at >= since)
+        ]
+        return sorted(found, key=lambda change: (change[0], change[1]))
+
+    def stream(self, customer_id, since=None):
+        """
+        SSE messages for one customer until EVENT_STREAM_MAX_SECONDS pass
+
+        Event ids are timestamps, so a reconnecting client's Last-Event-ID
+        resumes where it left off. Commits can land slightly out of
+        timestamp order, so each check looks back
+        EVENT_STREAM_LOOKBACK_SECONDS and skips changes already sent.
+        """
+        config = current_app.config
+        lookback = timedelta(seconds=config['EVENT_STREAM_LOOKBACK_SECONDS'])
+        poll_seconds = config['EVENT_STREAM_POLL_SECONDS']
+        heartbeat_seconds = config['EVENT_STREAM_HEARTBEAT_SECONDS']
+        timeout = min(poll_seconds, heartbeat_seconds) if poll_seconds else heartbeat_seconds
+
+        cursor = since or datetime.utcnow()
+        sent = {}
+        wake = self.subscribe(customer_id)
+        try:
+            yield f"retry: {config['EVENT_STREAM_RETRY_MS']}\n\n"
+            deadline = time.monotonic() + config['EVENT_STREAM_MAX_SECONDS']
+            heartbeat_at = time.monotonic() + heartbeat_seconds
+            check = True
+
+            while time.monotonic() < deadline:
+                if check:
+                    for timestamp, key, name, data in self.changes(customer_id, cursor - lookback):
+                        if key not in sent:
+                            sent[key] = timestamp
+                            yield format_event(name, timestamp.isoformat(), data)
+                        cursor = max(cursor, timestamp)
+                    sent = {key: ts for key, ts in sent.items() if ts >= cursor - lookback}
+
+                # Hold no connection or transaction while idle
+                db.session.remove()
+
+                check = wake.wait(timeout)
+                wake.clear()
+                if not check and poll_seconds:
+                    self.poll()
+                    db.session.remove()
+                    check = wake.is_set()
+                    wake.clear()
+
+                if time.monotonic() >= heartbeat_at:
+                    heartbeat_at = time.monotonic() + heartbeat_seconds
+                    yield ': keepalive\n\n'
+        finally:
+            self.unsubscribe(customer_id, wake)
+            db.session.remove()
+
+# Singleton instance
+event_stream_service = EventStreamService()
+
+@event.listens_for(db.session, 'after_flush')
+def _note_customer_changes(session, flush_context):
+    customer_ids = {obj.customer_id for obj in (*session.new, *session.dirty) if isinstance(obj, Order)}
+    ticket_ids = {obj.ticket_id for obj in session.new if isinstance(obj, TicketResponse)}
+    if ticket_ids:
+        customer_ids.update(session.connection().execute(
+            select(SupportTicket.customer_id).where(SupportTicket.id.in_(ticket_ids))
+        ).scalars())
+    if customer_ids:
+        notify_after_commit(session, customer_ids)
+
+@event.listens_for(db.session, 'after_commit')
+def _wake_customer_streams(session):
+    customer_ids = session.info.pop('event_stream_customers', None)
+    if customer_ids:
+        event_stream_service.publish(customer_ids)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_customer_changes(session):
+    session.info.pop('event_stream_customers', None)
@@ -0,0 +1,219 @@
+"""
+Demand forecasting service
+Loads per-product daily sales into a NumPy matrix and forecasts every
+product at once: moving averages, exponential smoothing, days until
+stock-out and a suggested reorder quantity
+"""
+
+from datetime import datetime, timedelta
+
+import click
+import numpy as np
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert
+
+from models_sqlalchemy import db
+from models_sqlalchemy.models import DemandForecast, Order, OrderItem, Product
+from services.analytics_service import bucket_expression
+
+def smoothing_weights(days, alpha):
+    """
+    Weights that turn a sales history into its exponentially smoothed level
+
+    level_0 = x_0, level_t = alpha * x_t + (1 - alpha) * level_(t-1), so the
+    final level is a fixed linear combination of the history and can be
+    computed for all products with one matrix-vector product
+    """
+    decay = (1 - alpha) ** np.arange(days - 1, -1, -1, dtype=np.float64)
+    weights = alpha * decay
+    weights[0] = decay[0]
+    return weights
+
+def forecast_matrix(sales, stock, alpha, lead_time_days, cover_days):
+    """
+    Forecast every row of a (products x days) daily sales matrix
+
+    Args:
+        sales: 2-D array of units sold, oldest day first
+        stock: 1-D array of units in stock per product
+        alpha: Exponential smoothing factor
+        lead_time_days: Restock lead time
+        cover_days: Extra days a reorder should cover
+
+    Returns:
+        dict of 1-D arrays: avg_daily_7, avg_daily_28, forecast_daily,
+        days_until_stockout (NaN when nothing sells) and reorder_quantity
+    """
+    days = sales.shape[1]
+
+    avg_7 = sales[:, -min(7, days):].mean(axis=1)
+    avg_28 = sales[:, -min(28, days):].mean(axis=1)
+    level = sales @ smoothing_weights(days, alpha).astype(sales.dtype)
+
+    stock = stock.astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_left = np.where(level > 0, stock / level, np.nan)
+
+    reorder = np.ceil(level * (lead_time_days + cover_days) - stock)
+    reorder = np.where(days_left <= lead_time_days, np.maximum(reorder, 0), 0)
+
+    return {
+        'avg_daily_7': avg_7,
+        'avg_daily_28': avg_28,
+        'forecast_daily': level,
+        'days_until_stockout': days_left,
+        'reorder_quantity': reorder.astype(np.int64)
+    }
+
+class ForecastService:
+    """Builds and stores demand forecasts"""
+
+    def load_sales(self, product_ids, start, days, provider_id=None):
+        """
+        Daily units sold from completed orders as a (products x days) matrix
+
+        Args:
+            product_ids: Sorted 1-D array of product ids (matrix rows)
+            start: First day (date) of the history
+            days: Number of days of history
+            provider_id: Restrict to one provider's products
+        """
+        day = bucket_expression(Order.created_at, 'day', db.engine.dialect.name).label('day')
+        end = start + timedelta(days=days)
+
+        query = db.session.query(OrderItem.product_id, day, db.func.sum(OrderItem.quantity))\
+            .join(Order, Order.id == OrderItem.order_id)\
+            .filter(
+                Order.payment_status == 'completed',
+                Order.created_at >= datetime.combine(start, datetime.min.time()),
+                Order.created_at < datetime.combine(end, datetime.min.time())
+            )
+        if provider_id is not None:
+            query = query.join(Product, Product.id == OrderItem.product_id)\
+                .filter(Product.provider_id == provider_id)
+
+        rows = query.group_by(OrderItem.product_id, day).all()
+        sales = np.zeros((len(product_ids), days), dtype=np.float32)
+        if not rows:
+            return sales
+
+        row_products, row_days, row_units = zip(*rows)
+        rows_index = np.searchsorted(product_ids, np.asarray(row_products))
+        days_index = (np.asarray(row_days, dtype='datetime64[D]') - np.datetime64(start, 'D'))\
+            .astype(np.int64)
+
+        # Sales of products deleted since are dropped
+        known = (rows_index < len(product_ids)) & \
+            (product_ids[np.minimum(rows_index, len(product_ids) - 1)] == np.asarray(row_products))
+        np.add.at(sales, (rows_index[known], days_index[known]),
+                  np.asarray(row_units, dtype=np.float32)[known])
+        return sales
+
+    def run(self, provider_id=None):
+        """
+        Recompute and store forecasts for all active products, or one provider's
+
+        Returns:
+            int: Number of products forecast
+        """
+        config = current_app.config
+        days = config['FORECAST_HISTORY_DAYS']
+        today = datetime.utcnow().date()
+
+        query = db.session.query(Product.id, Product.provider_id, Product.stock_quantity)\
+            .filter(Product.is_active == True)
+        if provider_id is not None:
+            query = query.filter(Product.provider_id == provider_id)
+        products = query.order_by(Product.id).all()
+
+        scope = delete(DemandForecast)
+        if provider_id is not None:
+            scope = scope.where(DemandForecast.provider_id == provider_id)
+
+        if not products:
+            db.session.execute(scope)
+            db.session.commit()
+            return 0
+
+        product_ids = np.fromiter((p.id for p in products), dtype=np.int64, count=len(products))
+        provider_ids = np.fromiter((p.provider_id for p in products), dtype=np.int64, count=len(products))
+        stock = np.fromiter((p.stock_quantity or 0 for p in products), dtype=np.int64, count=len(products))
+
+        sales = self.load_sales(product_ids, today - timedelta(days=days), days, provider_id)
+        result = forecast_matrix(
+            sales, stock, config['FORECAST_SMOOTHING'],
+            config['FORECAST_LEAD_TIME_DAYS'], config['FORECAST_COVER_DAYS']
+        )
+
+        computed_at = datetime.utcnow()
+        days_left = result['days_until_stockout']
+        rows = [
+            {
+                'product_id': int(product_ids[i]),
+                'provider_id': int(provider_ids[i]),
+                'avg_daily_7': float(result['avg_daily_7'][i]),
+                'avg_daily_28': float(result['avg_daily_28'][i]),
+                'forecast_daily': float(result['forecast_daily'][i]),
+                'stock_quantity': int(stock[i]),
+                'days_until_stockout': None if np.isnan(days_left[i]) else float(days_left[i]),
+                'reorder_quantity': int(result['reorder_quantity'][i]),
+                'computed_at': computed_at
+            }
+            for i in range(len(product_ids))
+        ]
+
+        try:
+            db.session.execute(scope)
+            db.session.execute(insert(DemandForecast), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return len(rows)
+
+    def for_provider(self, provider_id, alerts_only=False):
+        """Stored forecasts for a provider, recomputed first if stale or missing"""
+        config = current_app.config
+        oldest = db.session.query(db.func.min(DemandForecast.computed_at))\
+            .filter(DemandForecast.provider_id == provider_id).scalar()
+        # Active products added since the last run have no forecast yet
+        missing = db.session.query(Product.id)\
+            .outerjoin(DemandForecast, DemandForecast.product_id == Product.id)\
+            .filter(
+                Product.provider_id == provider_id,
+                Product.is_active == True,
+                DemandForecast.product_id == None
+            ).first() is not None
+
+        # A provider with no active products and no forecasts is up to date
+        max_age = timedelta(seconds=config['FORECAST_MAX_AGE_SECONDS'])
+        if missing or (oldest is not None and datetime.utcnow() - oldest > max_age):
+            self.run(provider_id)
+
+        query = DemandForecast.query.options(db.joinedload(DemandForecast.product))\
+            .filter(DemandForecast.provider_id == provider_id)
+        if alerts_only:
+            query = query.filter(
+                DemandForecast.days_until_stockout <= config['FORECAST_LEAD_TIME_DAYS']
+            )
+
+        # Products that run out first come first; those not selling go last
+        return query.order_by(
+            DemandForecast.days_until_stockout.is_(None),
+            DemandForecast.days_until_stockout
+        ).all()
+
+# Singleton instance
+forecast_service = ForecastService()
+
+@click.command('forecast-demand')
+@click.option('--provider-id', type=int, default=None, help='Only forecast this provider')
+@with_appcontext
+def forecast_demand_command(provider_id):
+    """Recompute demand forecasts and restock alerts"""
+    started = datetime.utcnow()
+    count = forecast_service.run(provider_id)
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    click.echo(f'Forecast {count} products in {elapsed:.2f}s')
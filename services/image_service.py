@@ -0,0 +1,170 @@
+"""
+Product image storage and thumbnail pipeline
+Stores uploads content-addressed in UPLOAD_FOLDER and renders
+resized/WebP variants in a background process pool
+"""
+
+import hashlib
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps
+
+CHUNK_SIZE = 64 * 1024
+
+def allowed_file(filename, allowed_extensions):
+    """Check that a filename has one of the allowed extensions"""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
+
+def variant_filename(digest, name):
+    """Filename of a rendered variant for an image digest"""
+    return f"{digest}_{name}.webp"
+
+def render_variants(source_path, digest, sizes, upload_folder, quality):
+    """
+    Render resized WebP variants of an image (runs in a worker process)
+
+    Args:
+        source_path: Path of the stored original
+        digest: Content hash of the original
+        sizes: Mapping of variant name to max (width, height)
+        upload_folder: Folder variants are written to
+        quality: WebP quality
+
+    Returns:
+        list: Filenames of the variants that were written
+    """
+    written = []
+
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+        for name, size in sizes.items():
+            filename = variant_filename(digest, name)
+            path = os.path.join(upload_folder, filename)
+
+            # Content-addressed, so an existing variant is already correct
+            if not os.path.exists(path):
+                variant = image.copy()
+                if size:
+                    variant.thumbnail(tuple(size), Image.LANCZOS)
+
+                tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                variant.save(tmp_path, 'WEBP', quality=quality, method=4)
+                os.replace(tmp_path, path)
+
+            written.append(filename)
+
+    return written
+
+class ImageService:
+    """Content-addressed image storage with off-thread variant rendering"""
+
+    def __init__(self):
+        self._executor = None
+        self._executor_pid = None
+
+    def _get_executor(self, max_workers):
+        # Pools do not survive a fork, so each gunicorn worker builds its own
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ProcessPoolExecutor(max_workers=max_workers)
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def store_original(self, file_storage, upload_folder):
+        """
+        Stream an uploaded file to disk under its SHA-256 name
+
+        Args:
+            file_storage: Werkzeug FileStorage from request.files
+            upload_folder: Destination folder
+
+        Returns:
+            tuple: (digest, filename) of the stored original
+        """
+        extension = file_storage.filename.rsplit('.', 1)[1].lower()
+        if extension == 'jpeg':
+            extension = 'jpg'
+
+        hasher = hashlib.sha256()
+        tmp_path = os.path.join(upload_folder, f".upload-{uuid.uuid4().hex}.tmp")
+
+        try:
+            with open(tmp_path, 'wb') as out:
+                while True:
+                    chunk = file_storage.stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    out.write(chunk)
+
+            # Reject anything Pillow cannot identify before it is stored
+            try:
+                with Image.open(tmp_path) as image:
+                    image.verify()
+            except Exception:
+                raise ValueError('Uploaded file is not a valid image')
+
+            digest = hasher.hexdigest()
+            filename = f"{digest}.{extension}"
+            path = os.path.join(upload_folder, filename)
+
+            # Identical bytes already stored - keep the existing copy
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return digest, filename
+
+    def submit_variants(self, digest, filename, config):
+        """
+        Queue variant rendering in the process pool
+
+        Args:
+            digest: Content hash of the stored original
+            filename: Filename of the stored original
+            config: Flask app config
+
+        Returns:
+            dict: Variant name to filename; until a variant is rendered the
+                  media route serves the original in its place
+        """
+        upload_folder = config['UPLOAD_FOLDER']
+        sizes = config['IMAGE_VARIANT_SIZES']
+
+        variants = {name: variant_filename(digest, name) for name in sizes}
+        pending = [
+            name for name, variant in variants.items()
+            if not os.path.exists(os.path.join(upload_folder, variant))
+        ]
+
+        if pending:
+            executor = self._get_executor(config['IMAGE_WORKERS'])
+            future = executor.submit(
+                render_variants,
+                os.path.join(upload_folder, filename),
+                digest,
+                {name: sizes[name] for name in pending},
+                upload_folder,
+                config['IMAGE_WEBP_QUALITY']
+            )
+            future.add_done_callback(self._report_failure)
+
+        return variants
+
+    @staticmethod
+    def _report_failure(future):
+        error = future.exception()
+        if error:
+            print(f"Error rendering image variants: {error}")
+
+# Singleton instance
+image_service = ImageService()
@@ -0,0 +1,190 @@
+"""
+Order and ticket number allocation
+Generates time-ordered, collision-free identifiers without a database
+round trip per number
+"""
+
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import func, insert, select, update
+
+# Snowflake-style layout: 41 bits of milliseconds since EPOCH, 10 bits of
+# node id and 12 bits of per-millisecond sequence
+EPOCH_MS = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+MAX_NODE = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Crockford base32, fixed width so string order matches numeric order
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+ENCODED_LENGTH = 13
+
+def encode(value):
+    """Encode a 63-bit integer as 13 Crockford base32 characters"""
+    chars = []
+    for _ in range(ENCODED_LENGTH):
+        value, remainder = divmod(value, 32)
+        chars.append(ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+def decode(encoded):
+    """Decode a 13 character base32 number back to an integer"""
+    value = 0
+    for char in encoded:
+        value = value * 32 + ALPHABET.index(char)
+    return value
+
+def lease_node_id(owner, lease_seconds):
+    """
+    Lease a free node id for this process from the node_leases table
+
+    Takes the lowest expired lease, or the next unused id, so live
+    processes never share a node id.
+
+    Args:
+        owner: Unique name of the leasing process
+        lease_seconds: How long the lease lasts without renewal
+
+    Returns:
+        int: The leased node id
+
+    Raises:
+        RuntimeError: Every node id is held by a live lease
+    """
+    from sqlalchemy.exc import IntegrityError
+    from models_sqlalchemy import db
+    from models_sqlalchemy.models import NodeLease
+
+    leases = NodeLease.__table__
+    # Another process may claim the same id between our read and write;
+    # the conditional update or primary key tells us, and we look again
+    for _ in range(MAX_NODE + 1):
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=lease_seconds)
+        try:
+            with db.engine.begin() as conn:
+                node_id = conn.execute(
+                    select(leases.c.node_id).where(leases.c.expires_at < now)
+                    .order_by(leases.c.node_id).limit(1)
+                ).scalar()
+                if node_id is not None:
+                    claimed = conn.execute(
+                        update(leases)
+                        .where(leases.c.node_id == node_id, leases.c.expires_at < now)
+                        .values(owner=owner, expires_at=expires_at)
+                    ).rowcount
+                    if claimed:
+                        return node_id
+                    continue
+
+                node_id = conn.execute(select(func.max(leases.c.node_id))).scalar()
+                node_id = 0 if node_id is None else node_id + 1
+                if node_id > MAX_NODE:
+                    raise RuntimeError(f'All {MAX_NODE + 1} number allocator node ids are leased')
+                conn.execute(insert(leases).values(node_id=node_id, owner=owner, expires_at=expires_at))
+                return node_id
+        except IntegrityError:
+            continue
+
+    raise RuntimeError('Could not lease a number allocator node id')
+
+def renew_node_lease(node_id, owner, lease_seconds):
+    """
+    Extend this process's lease on node_id
+
+    Returns:
+        bool: False if the lease was lost to another process
+    """
+    from models_sqlalchemy import db
+    from models_sqlalchemy.models import NodeLease
+
+    leases = NodeLease.__table__
+    with db.engine.begin() as conn:
+        return bool(conn.execute(
+            update(leases)
+            .where(leases.c.node_id == node_id, leases.c.owner == owner)
+            .values(expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+        ).rowcount)
+
+class NumberAllocator:
+    """Per-process generator of monotonic, time-ordered identifiers"""
+
+    def __init__(self, node_id=None, node_lease=lease_node_id, node_renew=renew_node_lease,
+                 lease_seconds=None):
+        self._lock = threading.Lock()
+        self._fixed_node_id = node_id
+        self._node_lease = node_lease
+        self._node_renew = node_renew
+        self._lease_seconds = lease_seconds
+        self._node_id = None
+        self._owner = None
+        self._renew_at = 0
+        self._pid = None
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _ensure_node(self):
+        if self._fixed_node_id is not None:
+            if self._node_id is None:
+                if not 0 <= self._fixed_node_id <= MAX_NODE:
+                    raise ValueError(f'node_id must be between 0 and {MAX_NODE}')
+                self._node_id = self._fixed_node_id
+            return
+
+        # A forked worker must not reuse its parent's node id
+        if self._node_id is None or self._pid != os.getpid():
+            lease_seconds = self._lease_seconds or current_app.config['NUMBER_NODE_LEASE_SECONDS']
+            self._pid = os.getpid()
+            self._owner = f'{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}'
+            self._node_id = self._node_lease(self._owner, lease_seconds)
+            self._renew_at = time.monotonic() + lease_seconds / 3
+            self._last_ms = -1
+            self._sequence = 0
+        elif time.monotonic() >= self._renew_at:
+            lease_seconds = self._lease_seconds or current_app.config['NUMBER_NODE_LEASE_SECONDS']
+            # Renew well before expiry; a lease lost while idle (e.g. the
+            # process was suspended) is replaced before any id is issued
+            if not self._node_renew(self._node_id, self._owner, lease_seconds):
+                self._node_id = self._node_lease(self._owner, lease_seconds)
+                self._last_ms = -1
+                self._sequence = 0
+            self._renew_at = time.monotonic() + lease_seconds / 3
+
+    def next_id(self):
+        """Return the next 63-bit identifier"""
+        with self._lock:
+            self._ensure_node()
+
+            now_ms = int(time.time() * 1000) - EPOCH_MS
+
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                # Same millisecond or the clock stepped back: keep counting
+                # from the last timestamp and borrow the next millisecond
+                # when the sequence is exhausted instead of waiting
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+
+            return (
+                (self._last_ms << (NODE_BITS + SEQUENCE_BITS))
+                | (self._node_id << SEQUENCE_BITS)
+                | self._sequence
+            )
+
+    def next_number(self, prefix):
+        """Return the next identifier formatted as PREFIX-XXXXXXXXXXXXX"""
+        return f"{prefix}-{encode(self.next_id())}"
+
+# Singleton instance
+number_allocator = NumberAllocator()
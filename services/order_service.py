@@ -0,0 +1,200 @@
+"""
+Order placement
+Writes an order, its items and the cart clear as one transaction, applies
+M-PESA payment results to it, and counts its sales towards product
+popularity once payment completes
+"""
+
+from sqlalchemy import insert
+from models_sqlalchemy import db
+from models_sqlalchemy.models import CartItem, Order, OrderItem, UnmatchedPayment
+from services.event_stream_service import notify_after_commit
+from services.popularity_service import popularity_service
+
+class OrderService:
+    """Order creation"""
+
+    def create_order(self, customer_id, cart, fields, clear_cart=True):
+        """
+        Create an order from priced cart lines in a single transaction
+
+        Args:
+            customer_id: Ordering customer
+            cart: Cart from cart_service.get_cart
+            fields: Order column values (order_number, payment_method, statuses, ...)
+            clear_cart: Delete the customer's cart lines in the same transaction
+
+        Returns:
+            Order: The committed order
+        """
+        try:
+            order = Order(customer_id=customer_id, total_amount=cart['total'], **fields)
+            db.session.add(order)
+            db.session.flush()
+
+            db.session.execute(insert(OrderItem), [
+                {
+                    'order_id': order.id,
+                    'product_id': item['product_id'],
+                    'quantity': item['quantity'],
+                    'price': item['price']
+                }
+                for item in cart['items']
+            ])
+
+            if clear_cart:
+                CartItem.query.filter_by(customer_id=customer_id)\
+                    .delete(synchronize_session=False)
+
+            if order.payment_status == 'completed':
+                popularity_service.record_sales(order.id, order.created_at)
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return order
+
+    def complete_payment(self, order, **fields):
+        """
+        Mark an order paid and count its sales, at most once
+
+        The status change is conditional, so a repeated or concurrent payment
+        callback for the same order cannot count it twice.
+
+        Args:
+            order: Order being paid
+            fields: Other order column values to set (receipt, order_status, ...)
+
+        Returns:
+            bool: False if the order was already completed
+        """
+        try:
+            updated = Order.query\
+                .filter(Order.id == order.id, Order.payment_status != 'completed')\
+                .update(dict(fields, payment_status='completed'))
+            if updated:
+                popularity_service.record_sales(order.id, order.created_at)
+                # The bulk update skips flush hooks, so wake the customer's stream here
+                notify_after_commit(db.session, [order.customer_id])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return bool(updated)
+
+    def fail_payment(self, order, **fields):
+        """
+        Mark an order's payment failed unless it has already completed
+
+        Args:
+            order: Order whose payment failed
+            fields: Other order column values to set (order_status, ...)
+
+        Returns:
+            bool: False if the order was already completed
+        """
+        try:
+            updated = Order.query\
+                .filter(Order.id == order.id, Order.payment_status != 'completed')\
+                .update(dict(fields, payment_status='failed'))
+            if updated:
+                notify_after_commit(db.session, [order.customer_id])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return bool(updated)
+
+    def apply_payment_result(self, order, result):
+        """
+        Apply a parsed M-PESA callback result to its order
+
+        Args:
+            order: Order the STK push was for
+            result: dict with result_code, receipt_number, transaction_date
+                    and phone_number (see UnmatchedPayment.result)
+
+        Returns:
+            bool: True if the order's payment status changed
+        """
+        if result['result_code'] == 0:
+            return self.complete_payment(
+                order,
+                order_status='processing',
+                mpesa_receipt_number=result['receipt_number'],
+                mpesa_transaction_date=result['transaction_date'],
+                mpesa_phone_number=result['phone_number']
+            )
+        return self.fail_payment(order, order_status='cancelled')
+
+    def record_unmatched_payment(self, checkout_request_id, merchant_request_id, result):
+        """
+        Keep a callback that matched no order so it can be reconciled
+
+        Checkout may commit the order's checkout id between the callback's
+        lookup and this commit, after it has already looked for early
+        payments; the order is looked up again so the result is still applied.
+
+        Returns:
+            UnmatchedPayment: The payment, with order_id set if it was applied
+        """
+        try:
+            payment = UnmatchedPayment(
+                checkout_request_id=checkout_request_id,
+                merchant_request_id=merchant_request_id,
+                **{key: result[key] for key in (
+                    'result_code', 'result_desc', 'amount', 'receipt_number',
+                    'transaction_date', 'phone_number'
+                )}
+            )
+            db.session.add(payment)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        order = Order.query.filter_by(mpesa_checkout_request_id=checkout_request_id).first()
+        if order:
+            # Committed together with the payment result below
+            payment.order_id = order.id
+            self.apply_payment_result(order, payment.result())
+
+        return payment
+
+    def attach_payment_request(self, order, checkout_request_id, merchant_request_id):
+        """
+        Record an accepted STK push on its pending order and clear the cart
+
+        A callback that arrived before this commit was parked as an
+        UnmatchedPayment; it is applied to the order now.
+
+        Returns:
+            Order: The order, with any early payment result applied
+        """
+        try:
+            order.mpesa_checkout_request_id = checkout_request_id
+            order.mpesa_merchant_request_id = merchant_request_id
+            CartItem.query.filter_by(customer_id=order.customer_id)\
+                .delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        early = UnmatchedPayment.query.filter_by(
+            checkout_request_id=checkout_request_id, order_id=None
+        ).order_by(UnmatchedPayment.id).first()
+        if early:
+            # Committed together with the payment result below
+            early.order_id = order.id
+            self.apply_payment_result(order, early.result())
+            db.session.refresh(order)
+
+        return order
+
+# Singleton instance
+order_service = OrderService()
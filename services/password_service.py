@@ -0,0 +1,90 @@
+"""
+Password hashing service
+Runs hash/verify in a bounded, low-priority process pool so login bursts
+cannot take every core away from other requests
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+)
+
+class PasswordServiceBusy(Exception):
+    """Raised when too many hash operations are already queued"""
+
+def normalize_method(method):
+    """Expand a werkzeug hash method to the full string stored in hashes"""
+    parts = method.split(':')
+
+    if parts[0] == 'scrypt' and len(parts) == 1:
+        return 'scrypt:32768:8:1'
+
+    if parts[0] == 'pbkdf2':
+        if len(parts) == 1:
+            parts.append('sha256')
+        if len(parts) == 2:
+            parts.append(str(DEFAULT_PBKDF2_ITERATIONS))
+        return ':'.join(parts)
+
+    return method
+
+def _lower_priority(niceness):
+    if niceness:
+        os.nice(niceness)
+
+class PasswordService:
+    """Password hashing with configurable parameters and off-thread verification"""
+
+    def __init__(self):
+        self._executor = None
+        self._executor_pid = None
+        self._slots = None
+
+    def _get_pool(self, config):
+        # Pools do not survive a fork, so each gunicorn worker builds its own
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ProcessPoolExecutor(
+                max_workers=config['PASSWORD_HASH_WORKERS'],
+                initializer=_lower_priority,
+                initargs=(config['PASSWORD_HASH_NICE'],)
+            )
+            self._executor_pid = os.getpid()
+            self._slots = threading.BoundedSemaphore(config['PASSWORD_HASH_MAX_PENDING'])
+        return self._executor, self._slots
+
+    def _run(self, fn, *args):
+        config = current_app.config
+
+        if not config['PASSWORD_HASH_WORKERS']:
+            return fn(*args)
+
+        executor, slots = self._get_pool(config)
+
+        if not slots.acquire(timeout=config['PASSWORD_HASH_QUEUE_TIMEOUT']):
+            raise PasswordServiceBusy('Too many login attempts in progress')
+
+        try:
+            return executor.submit(fn, *args).result()
+        finally:
+            slots.release()
+
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        method = normalize_method(current_app.config['PASSWORD_HASH_METHOD'])
+        return self._run(generate_password_hash, password, method)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash"""
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if a hash was made with different parameters than configured"""
+        method = normalize_method(current_app.config['PASSWORD_HASH_METHOD'])
+        return password_hash.split('$', 1)[0] != method
+
+# Singleton instance
+password_service = PasswordService()
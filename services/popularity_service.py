@@ -0,0 +1,111 @@
+"""
+Product popularity counters
+Keeps units_sold, order_count and last_sold_at on products up to date as
+orders complete, with a bulk reconciliation job to correct any drift
+"""
+
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, case, update
+
+from models_sqlalchemy import db
+from models_sqlalchemy.models import Order, OrderItem, Product
+
+class PopularityService:
+    """Maintains denormalized sales counters on Product"""
+
+    def record_sales(self, order_id, sold_at):
+        """
+        Add a newly completed order to its products' counters
+
+        Runs inside the caller's transaction; call exactly once per order,
+        when its payment_status becomes 'completed'
+        """
+        lines = db.session.query(OrderItem.product_id, db.func.sum(OrderItem.quantity))\
+            .filter(OrderItem.order_id == order_id)\
+            .group_by(OrderItem.product_id).all()
+        if not lines:
+            return
+
+        products = Product.__table__
+        sold_at_param = bindparam('sold_at')
+        db.session.execute(
+            update(products).where(products.c.id == bindparam('product_id')).values(
+                units_sold=products.c.units_sold + bindparam('units'),
+                order_count=products.c.order_count + 1,
+                last_sold_at=case(
+                    (db.or_(products.c.last_sold_at == None, products.c.last_sold_at < sold_at_param),
+                     sold_at_param),
+                    else_=products.c.last_sold_at
+                )
+            ),
+            [
+                {'product_id': product_id, 'units': int(units), 'sold_at': sold_at}
+                for product_id, units in lines
+            ]
+        )
+
+    def reconcile(self):
+        """
+        Recompute every product's counters from completed orders and fix
+        the ones that drifted
+
+        Returns:
+            int: Number of products corrected
+        """
+        totals = {
+            product_id: (int(units), orders, last_sold_at)
+            for product_id, units, orders, last_sold_at in db.session.query(
+                OrderItem.product_id,
+                db.func.sum(OrderItem.quantity),
+                db.func.count(db.distinct(OrderItem.order_id)),
+                db.func.max(Order.created_at)
+            ).join(Order, Order.id == OrderItem.order_id)
+            .filter(Order.payment_status == 'completed')
+            .group_by(OrderItem.product_id)
+        }
+
+        corrections = []
+        for product_id, units_sold, order_count, last_sold_at in db.session.query(
+            Product.id, Product.units_sold, Product.order_count, Product.last_sold_at
+        ):
+            expected = totals.get(product_id, (0, 0, None))
+            if (units_sold, order_count, last_sold_at) != expected:
+                corrections.append({
+                    'product_id': product_id,
+                    'units_sold': expected[0],
+                    'order_count': expected[1],
+                    'last_sold_at': expected[2]
+                })
+
+        if corrections:
+            products = Product.__table__
+            try:
+                db.session.execute(
+                    update(products).where(products.c.id == bindparam('product_id')).values(
+                        units_sold=bindparam('units_sold'),
+                        order_count=bindparam('order_count'),
+                        last_sold_at=bindparam('last_sold_at')
+                    ),
+                    corrections
+                )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+        return len(corrections)
+
+# Singleton instance
+popularity_service = PopularityService()
+
+@click.command('reconcile-product-counters')
+@with_appcontext
+def reconcile_product_counters_command():
+    """Recompute product sales counters from completed orders"""
+    started = datetime.utcnow()
+    count = popularity_service.reconcile()
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    click.echo(f'Corrected {count} products in {elapsed:.2f}s')
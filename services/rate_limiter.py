@@ -0,0 +1,219 @@
+"""
+Rate limiting service
+Token buckets keyed by client IP, user, email or phone number, held in
+process memory or in a shared SQLite file for multi-worker deployments
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request
+
+class MemoryBucketStore:
+    """Token buckets in a dict; a rejection is one lock and a few floats"""
+
+    def __init__(self, max_keys=100000):
+        # Least recently written first
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def consume(self, checks):
+        """
+        Take one token from every bucket, or none if any is empty
+
+        Args:
+            checks: List of (key, capacity, period_seconds)
+
+        Returns:
+            float: 0 if allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            refilled = []
+            retry_after = 0
+
+            for key, capacity, period in checks:
+                rate = capacity / period
+                tokens, last, _ = self._buckets.get(key, (capacity, now, now))
+                tokens = min(capacity, tokens + (now - last) * rate)
+                if tokens < 1:
+                    retry_after = max(retry_after, (1 - tokens) / rate)
+                refilled.append((key, tokens, rate, capacity))
+
+            if retry_after:
+                return retry_after
+
+            for key, tokens, rate, capacity in refilled:
+                tokens -= 1
+                self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+                self._buckets.move_to_end(key)
+
+            self._evict(now)
+
+        return 0
+
+    def _evict(self, now):
+        # A bucket that has refilled completely is the same as no bucket.
+        # Only the oldest entries are looked at, so each call does work in
+        # proportion to the buckets it removes; past max_keys the least
+        # recently used go even if not yet full.
+        buckets = self._buckets
+        while buckets:
+            key, (_, _, full_at) = next(iter(buckets.items()))
+            if full_at > now and len(buckets) <= self._max_keys:
+                break
+            del buckets[key]
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file shared by all workers on a host"""
+
+    def __init__(self, path):
+        self._path = path
+        self._local = threading.local()
+        self._calls = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_buckets ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, '
+                'updated_at REAL NOT NULL, full_at REAL NOT NULL)'
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def consume(self, checks):
+        """Same contract as MemoryBucketStore.consume, atomic across processes"""
+        now = time.time()
+        conn = self._connection()
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            refilled = []
+            retry_after = 0
+
+            for key, capacity, period in checks:
+                rate = capacity / period
+                row = conn.execute(
+                    'SELECT tokens, updated_at FROM rate_buckets WHERE key = ?', (key,)
+                ).fetchone()
+                tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+                if tokens < 1:
+                    retry_after = max(retry_after, (1 - tokens) / rate)
+                refilled.append((key, tokens, rate, capacity))
+
+            if not retry_after:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO rate_buckets (key, tokens, updated_at, full_at) '
+                    'VALUES (?, ?, ?, ?)',
+                    [
+                        (key, tokens - 1, now, now + (capacity - tokens + 1) / rate)
+                        for key, tokens, rate, capacity in refilled
+                    ]
+                )
+
+            self._calls += 1
+            if self._calls % 1000 == 0:
+                conn.execute('DELETE FROM rate_buckets WHERE full_at <= ?', (now,))
+
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        return retry_after
+
+def _client_ip():
+    # Behind TRUSTED_PROXY_COUNT proxies, ProxyFix has already replaced
+    # remote_addr with the client address they forwarded
+    return request.remote_addr
+
+def _jwt_user():
+    try:
+        from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+def _json_field(*names):
+    data = request.get_json(silent=True) or {}
+    for name in names:
+        value = data.get(name)
+        if isinstance(value, str) and value.strip():
+            return value
+    return None
+
+def _email():
+    email = _json_field('email')
+    return email.strip().lower() if email else None
+
+def _phone():
+    phone = _json_field('phone_number', 'phone')
+    if not phone:
+        return None
+    digits = ''.join(ch for ch in phone if ch.isdigit())
+    # 07XXXXXXXX, 2547XXXXXXXX and +2547XXXXXXXX are the same subscriber
+    return digits[-9:] or None
+
+KEY_FUNCTIONS = {
+    'ip': _client_ip,
+    'user': _jwt_user,
+    'email': _email,
+    'phone': _phone
+}
+
+class RateLimiter:
+    """Applies the RATE_LIMITS rules of a named route"""
+
+    def __init__(self):
+        self._store = None
+        self._store_pid = None
+
+    def _get_store(self):
+        if self._store is None or self._store_pid != os.getpid():
+            storage = current_app.config['RATE_LIMIT_STORAGE']
+            if storage.startswith('sqlite:///'):
+                self._store = SQLiteBucketStore(storage[len('sqlite:///'):])
+            else:
+                self._store = MemoryBucketStore(current_app.config['RATE_LIMIT_MEMORY_MAX_KEYS'])
+            self._store_pid = os.getpid()
+        return self._store
+
+    def hit(self, name):
+        """
+        Count a request against the rules for `name`
+
+        Returns:
+            int: 0 if allowed, otherwise whole seconds the client should wait
+        """
+        if not current_app.config['RATE_LIMIT_ENABLED']:
+            return 0
+
+        rules = current_app.config['RATE_LIMITS'].get(name) or {}
+        checks = []
+
+        for key_type, (limit, period) in rules.items():
+            identifier = KEY_FUNCTIONS[key_type]()
+            if identifier is not None:
+                checks.append((f"{name}:{key_type}:{identifier}", limit, period))
+
+        if not checks:
+            return 0
+
+        retry_after = self._get_store().consume(checks)
+        return math.ceil(retry_after) if retry_after else 0
+
+# Singleton instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,249 @@
+"""
+Frequently-bought-together recommendations
+Counts product co-occurrence in completed orders with sparse NumPy pair
+arithmetic and keeps the top neighbours of each product in
+product_recommendations, so serving is one primary-key range lookup
+"""
+
+from datetime import datetime, timedelta
+
+import click
+import numpy as np
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert
+
+from models_sqlalchemy import db
+from models_sqlalchemy.models import NumberSequence, Order, OrderItem, Product, ProductRecommendation
+
+WATERMARK_KEY = 'recommendations'
+
+def order_pairs(order_ids, product_ids, max_items):
+    """
+    Every ordered (product, other product) pair bought in the same order
+
+    Args:
+        order_ids: 1-D array, order of each order line
+        product_ids: 1-D array, product of each order line
+        max_items: Orders with more distinct products are skipped
+
+    Returns:
+        (left, right): 1-D arrays of product ids, both directions of each pair
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    if len(order_ids) == 0:
+        return empty, empty
+
+    order_ids = np.asarray(order_ids, dtype=np.int64)
+    product_ids = np.asarray(product_ids, dtype=np.int64)
+
+    # Sort by order then product and drop repeated lines of the same product
+    by_order = np.lexsort((product_ids, order_ids))
+    order_ids, product_ids = order_ids[by_order], product_ids[by_order]
+    first = np.r_[True, (order_ids[1:] != order_ids[:-1]) | (product_ids[1:] != product_ids[:-1])]
+    order_ids, product_ids = order_ids[first], product_ids[first]
+
+    starts = np.flatnonzero(np.r_[True, order_ids[1:] != order_ids[:-1]])
+    sizes = np.diff(np.r_[starts, len(order_ids)])
+    keep = np.repeat((sizes >= 2) & (sizes <= max_items), sizes)
+    product_ids = product_ids[keep]
+    sizes = sizes[(sizes >= 2) & (sizes <= max_items)]
+    if len(sizes) == 0:
+        return empty, empty
+
+    # Line i pairs with every line of its own order: repeat i size times and
+    # walk the order's lines alongside it
+    per_line = np.repeat(sizes, sizes)
+    line_starts = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    left = np.repeat(np.arange(len(product_ids)), per_line)
+    offsets = np.arange(len(left)) - np.repeat(np.cumsum(per_line) - per_line, per_line)
+    right = np.repeat(line_starts, per_line) + offsets
+
+    distinct = left != right
+    return product_ids[left[distinct]], product_ids[right[distinct]]
+
+def aggregate_pairs(left, right, weights=None):
+    """Sum weights (default 1) per distinct (left, right) pair"""
+    keys = (left.astype(np.int64) << 32) | right.astype(np.int64)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, weights=weights, minlength=len(unique)).astype(np.int64)
+    return unique >> 32, unique & 0xFFFFFFFF, counts
+
+def top_neighbours(left, right, counts, k):
+    """Keep the k highest-count pairs per left product, with their rank"""
+    order = np.lexsort((right, -counts, left))
+    left, right, counts = left[order], right[order], counts[order]
+
+    starts = np.flatnonzero(np.r_[True, left[1:] != left[:-1]])
+    sizes = np.diff(np.r_[starts, len(left)])
+    rank = np.arange(len(left)) - np.repeat(starts, sizes)
+
+    keep = rank < k
+    return left[keep], rank[keep], right[keep], counts[keep]
+
+class RecommendationService:
+    """Builds and serves frequently-bought-together neighbours"""
+
+    def _load_lines(self, after_order_id, through_order_id):
+        rows = db.session.query(OrderItem.order_id, OrderItem.product_id)\
+            .join(Order, Order.id == OrderItem.order_id)\
+            .filter(
+                Order.payment_status == 'completed',
+                Order.id > after_order_id,
+                Order.id <= through_order_id
+            ).all()
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        order_ids, product_ids = zip(*rows)
+        return np.asarray(order_ids, dtype=np.int64), np.asarray(product_ids, dtype=np.int64)
+
+    def _watermark(self):
+        row = db.session.get(NumberSequence, WATERMARK_KEY)
+        return row.value if row else 0
+
+    def _settled_order_id(self, after_order_id):
+        # Pending orders may still complete; stop just before the oldest one
+        # that is recent enough to matter so it is counted once it settles
+        settle_before = datetime.utcnow() - timedelta(
+            seconds=current_app.config['RECOMMENDATION_SETTLE_SECONDS']
+        )
+        pending = db.session.query(db.func.min(Order.id)).filter(
+            Order.id > after_order_id,
+            Order.payment_status == 'pending',
+            Order.created_at > settle_before
+        ).scalar()
+        if pending is not None:
+            return pending - 1
+        return db.session.query(db.func.max(Order.id)).scalar() or 0
+
+    def _write(self, watermark, product_scope=None, neighbours=None):
+        try:
+            if product_scope is not None:
+                db.session.execute(product_scope)
+            if neighbours is not None and len(neighbours[0]):
+                left, rank, right, counts = neighbours
+                db.session.execute(insert(ProductRecommendation), [
+                    {
+                        'product_id': int(left[i]),
+                        'rank': int(rank[i]),
+                        'recommended_product_id': int(right[i]),
+                        'score': int(counts[i])
+                    }
+                    for i in range(len(left))
+                ])
+            db.session.merge(NumberSequence(name=WATERMARK_KEY, value=watermark))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def rebuild(self):
+        """
+        Recount co-occurrence over all settled completed orders
+
+        Returns:
+            int: Number of neighbour rows stored
+        """
+        config = current_app.config
+        through = self._settled_order_id(0)
+
+        left, right = order_pairs(*self._load_lines(0, through),
+                                  config['RECOMMENDATION_MAX_ORDER_ITEMS'])
+        neighbours = top_neighbours(*aggregate_pairs(left, right), config['RECOMMENDATION_STORED'])
+
+        self._write(through, delete(ProductRecommendation), neighbours)
+        return len(neighbours[0])
+
+    def update(self):
+        """
+        Fold orders settled since the last run into the stored neighbours
+
+        Scores of stored pairs are exact; a pair that was outside a product's
+        stored neighbours only counts from this run on, which the extra
+        stored candidates and a periodic rebuild absorb
+
+        Returns:
+            int: Number of products whose neighbours changed
+        """
+        config = current_app.config
+        watermark = self._watermark()
+        through = self._settled_order_id(watermark)
+        if through <= watermark:
+            return 0
+
+        left, right = order_pairs(*self._load_lines(watermark, through),
+                                  config['RECOMMENDATION_MAX_ORDER_ITEMS'])
+        if not len(left):
+            self._write(through)
+            return 0
+
+        left, right, counts = aggregate_pairs(left, right)
+        affected = np.unique(left).tolist()
+
+        stored = []
+        for i in range(0, len(affected), 500):
+            stored += db.session.query(
+                ProductRecommendation.product_id,
+                ProductRecommendation.recommended_product_id,
+                ProductRecommendation.score
+            ).filter(ProductRecommendation.product_id.in_(affected[i:i + 500])).all()
+
+        if stored:
+            stored_left, stored_right, stored_counts = (np.asarray(c, dtype=np.int64) for c in zip(*stored))
+            left = np.r_[left, stored_left]
+            right = np.r_[right, stored_right]
+            counts = np.r_[counts, stored_counts]
+            left, right, counts = aggregate_pairs(left, right, counts)
+
+        neighbours = top_neighbours(left, right, counts, config['RECOMMENDATION_STORED'])
+        self._write(
+            through,
+            delete(ProductRecommendation).where(ProductRecommendation.product_id.in_(affected)),
+            neighbours
+        )
+        return len(affected)
+
+    def _recommended_products(self):
+        return db.session.query(Product)\
+            .join(ProductRecommendation, ProductRecommendation.recommended_product_id == Product.id)\
+            .filter(Product.is_active == True, Product.is_approved == True)
+
+    def for_product(self, product_id, limit=None):
+        """Products most often bought with a product, best first"""
+        limit = limit or current_app.config['RECOMMENDATION_LIMIT']
+        return self._recommended_products()\
+            .filter(ProductRecommendation.product_id == product_id)\
+            .order_by(ProductRecommendation.rank).limit(limit).all()
+
+    def for_products(self, product_ids, limit=None):
+        """Products most often bought with any of several (e.g. a cart's), excluding them"""
+        product_ids = list(product_ids)
+        if not product_ids:
+            return []
+
+        limit = limit or current_app.config['RECOMMENDATION_LIMIT']
+        score = db.func.sum(ProductRecommendation.score)
+        return self._recommended_products()\
+            .filter(
+                ProductRecommendation.product_id.in_(product_ids),
+                ProductRecommendation.recommended_product_id.notin_(product_ids)
+            ).group_by(Product.id)\
+            .order_by(score.desc(), Product.id).limit(limit).all()
+
+# Singleton instance
+recommendation_service = RecommendationService()
+
+@click.command('build-recommendations')
+@click.option('--full', is_flag=True, help='Recount all orders instead of only new ones')
+@with_appcontext
+def build_recommendations_command(full):
+    """Update frequently-bought-together recommendations"""
+    started = datetime.utcnow()
+    if full:
+        count = recommendation_service.rebuild()
+        summary = f'Stored {count} neighbours'
+    else:
+        count = recommendation_service.update()
+        summary = f'Updated {count} products'
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    click.echo(f'{summary} in {elapsed:.2f}s')
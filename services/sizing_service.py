@@ -0,0 +1,140 @@
+"""
+Solar kit sizing
+Matches a lighting load (rooms x watts x hours) against every approved
+product in one vectorized pass over a cached columnar copy of their specs
+"""
+
+import threading
+import time
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import event
+
+from models_sqlalchemy import db
+from models_sqlalchemy.models import Product
+
+class SpecSnapshot:
+    """Numeric specs of sellable products as parallel NumPy columns"""
+
+    def __init__(self, rows, depth_of_discharge):
+        count = len(rows)
+        self.ids = np.fromiter((r.id for r in rows), dtype=np.int64, count=count)
+        self.price = np.fromiter((r.price for r in rows), dtype=np.float64, count=count)
+        self.stock = np.fromiter((r.stock_quantity or 0 for r in rows), dtype=np.int64, count=count)
+        wattage = np.fromiter((r.wattage or 0 for r in rows), dtype=np.float64, count=count)
+        battery = np.fromiter((r.battery_wh or np.nan for r in rows), dtype=np.float64, count=count)
+        runtime = np.fromiter((r.runtime_hours or np.nan for r in rows), dtype=np.float64, count=count)
+
+        # Usable energy per unit: the battery within its safe depth of
+        # discharge, or rated power over the advertised runtime
+        self.energy_wh = np.where(np.isnan(battery), wattage * runtime, battery * depth_of_discharge)
+        self.energy_wh = np.nan_to_num(self.energy_wh, nan=0.0)
+        self.wattage = wattage
+        self.loaded_at = time.monotonic()
+
+class SizingService:
+    """Ranks products and quantities that cover a lighting load"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def _get_snapshot(self):
+        config = current_app.config
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < config['SIZING_CACHE_SECONDS']:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or time.monotonic() - snapshot.loaded_at >= config['SIZING_CACHE_SECONDS']:
+                rows = db.session.query(
+                    Product.id, Product.price, Product.stock_quantity, Product.wattage,
+                    Product.battery_wh, Product.runtime_hours
+                ).filter(Product.is_active == True, Product.is_approved == True).all()
+                snapshot = SpecSnapshot(rows, config['SIZING_DEPTH_OF_DISCHARGE'])
+                self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self):
+        """Drop the cached specs so the next request reloads them"""
+        self._snapshot = None
+
+    def rank(self, rooms, hours, watts_per_room, extra_watts=0, max_price=None,
+             max_units=None, limit=10):
+        """
+        Rank kits for a load
+
+        Args:
+            rooms: Number of rooms to light
+            hours: Hours of light needed per night
+            watts_per_room: Lamp power per room
+            extra_watts: Other loads run over the same hours (phone charging, radio)
+            max_price: Budget for the whole kit
+            max_units: Most units of one product a kit may use
+            limit: Number of kits to return
+
+        Returns:
+            dict: load summary and kits (product_id, units, total_price,
+                  runtime_hours at this load, surplus_energy_wh)
+        """
+        snapshot = self._get_snapshot()
+        max_units = max_units or current_app.config['SIZING_MAX_UNITS']
+
+        load_w = rooms * watts_per_room + extra_watts
+        energy_needed = load_w * hours
+
+        usable = (snapshot.energy_wh > 0) & (snapshot.wattage > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            units = np.maximum(
+                np.ceil(energy_needed / snapshot.energy_wh),
+                np.ceil(load_w / snapshot.wattage)
+            )
+        units = np.where(usable, np.maximum(units, 1), np.inf)
+
+        total_price = units * snapshot.price
+        fits = usable & (units <= max_units) & (units <= snapshot.stock)
+        if max_price is not None:
+            fits &= total_price <= max_price
+
+        candidates = np.flatnonzero(fits)
+        supplied = units[candidates] * snapshot.energy_wh[candidates]
+        surplus = supplied - energy_needed
+
+        # Cheapest kit first; among equal prices, the one wasting least capacity
+        order = np.lexsort((surplus, total_price[candidates]))[:limit]
+
+        return {
+            'load_watts': load_w,
+            'energy_needed_wh': energy_needed,
+            'kits': [
+                {
+                    'product_id': int(snapshot.ids[candidates[i]]),
+                    'units': int(units[candidates[i]]),
+                    'total_price': float(total_price[candidates[i]]),
+                    'runtime_hours': round(float(supplied[i] / load_w), 1),
+                    'surplus_energy_wh': round(float(surplus[i]), 1)
+                }
+                for i in order
+            ]
+        }
+
+# Singleton instance
+sizing_service = SizingService()
+
+# Other workers pick up product changes when their snapshot expires; this
+# process drops its own copy as soon as it commits one
+@event.listens_for(db.session, 'after_flush')
+def _note_product_change(session, flush_context):
+    if any(isinstance(obj, Product) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['sizing_stale'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_on_product_change(session):
+    if session.info.pop('sizing_stale', False):
+        sizing_service.invalidate()
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_product_change(session):
+    session.info.pop('sizing_stale', None)
@@ -0,0 +1,250 @@
+"""
+Search suggestions
+Prefix index over sellable product names, panel types and brand names: a
+sorted list of (key, kind, ref, display, at_start) searched with bisect,
+updated in place from product and provider profile updated_at watermarks
+"""
+
+import bisect
+import re
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from flask import current_app
+
+from models_sqlalchemy import db
+from models_sqlalchemy.models import Product, ProviderProfile
+
+KIND_ORDER = {'brand': 0, 'panel_type': 1, 'product': 2}
+
+_WORD = re.compile(r'\w+')
+_SPACES = re.compile(r'\s+')
+
+def normalize(text):
+    return _SPACES.sub(' ', text.strip().lower())
+
+def word_keys(text):
+    """Suffixes of text starting at each word, so 'lan' finds 'Solar Lantern'"""
+    text = normalize(text)
+    return [(text[match.start():], match.start() == 0) for match in _WORD.finditer(text)]
+
+class SuggestIndex:
+    """Sorted prefix index with incremental add/remove"""
+
+    def __init__(self):
+        self.entries = []
+        self.product_keys = {}
+        self.product_facets = {}
+        self.brand_counts = Counter()
+        self.panel_counts = Counter()
+        self.brand_names = {}
+        self.watermark = None
+        self.brand_watermark = None
+
+    def _insert(self, entry):
+        bisect.insort(self.entries, entry)
+
+    def _remove(self, entry):
+        position = bisect.bisect_left(self.entries, entry)
+        if position < len(self.entries) and self.entries[position] == entry:
+            del self.entries[position]
+
+    def _entries(self, kind, ref, display):
+        return [(key, kind, ref, display, at_start) for key, at_start in word_keys(display)]
+
+    def _count(self, counts, kind, ref, display, delta):
+        if not display:
+            return
+        counts[ref] += delta
+        # Brands and panel types are listed while any sellable product has them
+        if delta > 0 and counts[ref] == 1:
+            for entry in self._entries(kind, ref, display):
+                self._insert(entry)
+        elif delta < 0 and counts[ref] == 0:
+            del counts[ref]
+            for entry in self._entries(kind, ref, display):
+                self._remove(entry)
+
+    def remove_product(self, product_id):
+        for entry in self.product_keys.pop(product_id, ()):
+            self._remove(entry)
+
+        facets = self.product_facets.pop(product_id, None)
+        if facets:
+            provider_id, brand, panel_type = facets
+            self._count(self.brand_counts, 'brand', provider_id, brand, -1)
+            self._count(self.panel_counts, 'panel_type', panel_type, panel_type, -1)
+
+    def add_product(self, product):
+        sellable = product.is_active and product.is_approved
+        entries = self._entries('product', product.id, product.name) if sellable else None
+        facets = (product.provider_id, self.brand_names.get(product.provider_id), product.solar_panel_type)
+        # Already indexed as it is now
+        if sellable and self.product_keys.get(product.id) == entries and \
+                self.product_facets.get(product.id) == facets:
+            return
+
+        self.remove_product(product.id)
+        if not sellable:
+            return
+
+        for entry in entries:
+            self._insert(entry)
+        self.product_keys[product.id] = entries
+
+        # Remember what was counted so removal undoes exactly that
+        provider_id, brand, panel_type = facets
+        self.product_facets[product.id] = facets
+        self._count(self.brand_counts, 'brand', provider_id, brand, 1)
+        self._count(self.panel_counts, 'panel_type', panel_type, panel_type, 1)
+
+    def set_brand(self, provider_id, name):
+        """Rename a provider's brand, re-keying it if its products are listed"""
+        old = self.brand_names.get(provider_id)
+        self.brand_names[provider_id] = name
+        if old == name:
+            return
+
+        product_ids = [
+            product_id for product_id, facets in self.product_facets.items() if facets[0] == provider_id
+        ]
+        for product_id in product_ids:
+            _, _, panel_type = self.product_facets[product_id]
+            self.product_facets[product_id] = (provider_id, name, panel_type)
+        if not product_ids:
+            return
+
+        if old:
+            self.brand_counts.pop(provider_id, None)
+            for entry in self._entries('brand', provider_id, old):
+                self._remove(entry)
+        if name:
+            self.brand_counts[provider_id] = len(product_ids)
+            for entry in self._entries('brand', provider_id, name):
+                self._insert(entry)
+
+    def suggest(self, prefix, limit, scan):
+        """
+        Up to `limit` distinct matches for a prefix
+
+        Looks at no more than `scan` index entries, then prefers brands and
+        panel types, matches at the start of a name, and shorter names
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        found = {}
+        position = bisect.bisect_left(self.entries, (prefix,))
+        for key, kind, ref, display, at_start in self.entries[position:position + scan]:
+            if not key.startswith(prefix):
+                break
+            previous = found.get((kind, ref))
+            if previous is None or (at_start and not previous[0]):
+                found[(kind, ref)] = (at_start, display)
+
+        ranked = sorted(
+            found.items(),
+            key=lambda item: (KIND_ORDER[item[0][0]], not item[1][0], len(item[1][1]), item[1][1])
+        )
+        return [
+            {'type': kind, 'id': ref if kind != 'panel_type' else None, 'name': display}
+            for (kind, ref), (_, display) in ranked[:limit]
+        ]
+
+class SuggestService:
+    """Keeps a SuggestIndex current and answers typeahead queries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._checked_at = 0
+        self._loaded_at = 0
+
+    def _build(self, now):
+        index = SuggestIndex()
+        index.watermark = db.session.query(db.func.max(Product.updated_at)).scalar()
+        index.brand_watermark = db.session.query(db.func.max(ProviderProfile.updated_at)).scalar()
+        index.brand_names = dict(
+            db.session.query(ProviderProfile.user_id, ProviderProfile.business_name).all()
+        )
+        for product in Product.query.filter(Product.is_active == True, Product.is_approved == True):
+            index.add_product(product)
+        self._index = index
+        self._loaded_at = self._checked_at = now
+
+    def _refresh(self, now):
+        config = current_app.config
+        index = self._index
+
+        if index.watermark is None or now - self._loaded_at >= config['SUGGEST_FULL_REFRESH_SECONDS']:
+            self._build(now)
+            return
+
+        # Commits can land out of updated_at order, so look back past each
+        # watermark; rows already applied come back and change nothing
+        lookback = timedelta(seconds=config['SUGGEST_LOOKBACK_SECONDS'])
+
+        profiles = db.session.query(
+            ProviderProfile.user_id, ProviderProfile.business_name, ProviderProfile.updated_at
+        )
+        if index.brand_watermark is not None:
+            profiles = profiles.filter(ProviderProfile.updated_at >= index.brand_watermark - lookback)
+        profiles = profiles.all()
+        if profiles:
+            with self._lock:
+                for provider_id, business_name, _ in profiles:
+                    index.set_brand(provider_id, business_name)
+            index.brand_watermark = max(filter(None, [index.brand_watermark, *(p.updated_at for p in profiles)]))
+
+        changed = Product.query.filter(Product.updated_at >= index.watermark - lookback).all()
+        if changed:
+            # A provider with no profile row yet has no brand to list
+            missing = {p.provider_id for p in changed} - index.brand_names.keys()
+            if missing:
+                index.brand_names.update(db.session.query(
+                    ProviderProfile.user_id, ProviderProfile.business_name
+                ).filter(ProviderProfile.user_id.in_(missing)).all())
+
+            with self._lock:
+                for product in changed:
+                    index.add_product(product)
+            index.watermark = max([index.watermark, *(p.updated_at for p in changed if p.updated_at)])
+
+        # Deleted products leave no updated_at behind; a count mismatch reveals them
+        sellable = db.session.query(db.func.count(Product.id))\
+            .filter(Product.is_active == True, Product.is_approved == True).scalar()
+        if sellable != len(index.product_keys):
+            self._build(now)
+            return
+
+        self._checked_at = now
+
+    def _current(self):
+        config = current_app.config
+        now = time.monotonic()
+        if self._index is not None and now - self._checked_at < config['SUGGEST_REFRESH_SECONDS']:
+            return
+
+        with self._lock:
+            if self._index is None:
+                self._build(now)
+                return
+            if now - self._checked_at < config['SUGGEST_REFRESH_SECONDS']:
+                return
+            # Claim this refresh so concurrent requests keep using the index
+            self._checked_at = now
+        self._refresh(now)
+
+    def suggest(self, prefix, limit=None):
+        """Typeahead suggestions: brands, panel types and products for a prefix"""
+        config = current_app.config
+        self._current()
+        limit = min(limit or config['SUGGEST_LIMIT'], config['SUGGEST_MAX_LIMIT'])
+        with self._lock:
+            return self._index.suggest(prefix, limit, config['SUGGEST_SCAN_LIMIT'])
+
+# Singleton instance
+suggest_service = SuggestService()
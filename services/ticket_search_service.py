@@ -0,0 +1,205 @@
+"""
+Support ticket search
+Full-text index over each ticket's subject, message and responses (FTS5 on
+SQLite, a weighted tsvector with a GIN index on PostgreSQL), reindexed per
+ticket in the same transaction as the change
+"""
+
+import re
+from collections import defaultdict
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import Integer, bindparam, column, event, inspect, literal_column, select, table, text
+
+from models_sqlalchemy import db
+from models_sqlalchemy.models import Order, SupportTicket, TicketResponse
+from services.ticket_service import ticket_service
+
+_TERM = re.compile(r'\w+')
+
+_FTS5 = table('ticket_search', column('rowid', Integer))
+_TSVECTOR = table('ticket_search', column('ticket_id', Integer), column('document'))
+
+_DELETE = {
+    'sqlite': 'DELETE FROM ticket_search WHERE rowid IN :ticket_ids',
+    'postgresql': 'DELETE FROM ticket_search WHERE ticket_id IN :ticket_ids'
+}
+_INSERT = {
+    'sqlite': 'INSERT INTO ticket_search (rowid, subject, body) VALUES (:ticket_id, :subject, :body)',
+    'postgresql': "INSERT INTO ticket_search (ticket_id, document) VALUES (:ticket_id, "
+                  "setweight(to_tsvector('english', :subject), 'A') || "
+                  "setweight(to_tsvector('english', :body), 'B'))"
+}
+
+def search_terms(query, max_terms):
+    """Lowercased words of a free-text query; punctuation never reaches the engine"""
+    return _TERM.findall(query.lower())[:max_terms]
+
+def match_expression(terms, dialect_name):
+    """All terms must match; the last may be a prefix of a word"""
+    if dialect_name == 'postgresql':
+        return ' & '.join([f"'{term}'" for term in terms[:-1]] + [f"'{terms[-1]}':*"])
+    return ' '.join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+
+class TicketSearchService:
+    """Maintains and queries the ticket_search full-text index"""
+
+    def index_tickets(self, connection, ticket_ids):
+        """Rewrite the index rows of the given tickets from their current text"""
+        ticket_ids = sorted(ticket_ids)
+        if not ticket_ids:
+            return
+
+        replies = defaultdict(list)
+        for ticket_id, message in connection.execute(
+            select(TicketResponse.ticket_id, TicketResponse.message)
+            .where(TicketResponse.ticket_id.in_(ticket_ids))
+            .order_by(TicketResponse.id)
+        ):
+            replies[ticket_id].append(message)
+
+        rows = [
+            {'ticket_id': ticket_id, 'subject': subject, 'body': '\n'.join([message, *replies[ticket_id]])}
+            for ticket_id, subject, message in connection.execute(
+                select(SupportTicket.id, SupportTicket.subject, SupportTicket.message)
+                .where(SupportTicket.id.in_(ticket_ids))
+            )
+        ]
+
+        dialect = connection.dialect.name
+        connection.execute(
+            text(_DELETE[dialect]).bindparams(bindparam('ticket_ids', expanding=True)),
+            {'ticket_ids': ticket_ids}
+        )
+        if rows:
+            connection.execute(text(_INSERT[dialect]), rows)
+
+    def rebuild(self, batch_size=1000):
+        """
+        Reindex every ticket, e.g. after bulk imports or deletes that
+        bypass the session
+
+        Returns:
+            int: Number of tickets indexed
+        """
+        try:
+            connection = db.session.connection()
+            connection.execute(text('DELETE FROM ticket_search'))
+            ticket_ids = [row[0] for row in connection.execute(select(SupportTicket.id))]
+            for start in range(0, len(ticket_ids), batch_size):
+                self.index_tickets(connection, ticket_ids[start:start + batch_size])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(ticket_ids)
+
+    def search(self, query, status=None, order_number=None, start=None, end=None, page=1, limit=None):
+        """
+        Ranked ticket search
+
+        Args:
+            query: Free text matched against subject, message and responses
+            status: Only tickets with this status
+            order_number: Only tickets about this order
+            start, end: Only tickets created in [start, end)
+            page: 1-based page number
+            limit: Page size, capped at TICKET_SEARCH_MAX_LIMIT
+
+        Returns:
+            dict: tickets (summaries, best match first), total, page and limit
+        """
+        config = current_app.config
+        limit = min(limit or config['TICKET_SEARCH_LIMIT'], config['TICKET_SEARCH_MAX_LIMIT'])
+        result = {'tickets': [], 'total': 0, 'page': page, 'limit': limit}
+
+        terms = search_terms(query, config['TICKET_SEARCH_MAX_TERMS'])
+        if not terms:
+            return result
+
+        dialect = db.engine.dialect.name
+        expression = match_expression(terms, dialect)
+        if dialect == 'postgresql':
+            tsquery = db.func.to_tsquery('english', expression)
+            # Subject words are weighted 'A', so subject matches rank first
+            hits = select(
+                _TSVECTOR.c.ticket_id,
+                (-db.func.ts_rank_cd(_TSVECTOR.c.document, tsquery)).label('rank')
+            ).where(_TSVECTOR.c.document.op('@@')(tsquery)).cte('hits')
+        else:
+            # bm25 is lower for better matches; subject hits count four times.
+            # Materialized, or SQLite may re-run MATCH once per candidate ticket
+            hits = select(
+                _FTS5.c.rowid.label('ticket_id'),
+                db.func.bm25(literal_column('ticket_search'), 4.0, 1.0).label('rank')
+            ).where(literal_column('ticket_search').op('MATCH')(expression))\
+                .cte('hits').prefix_with('MATERIALIZED')
+
+        matches = select(hits.c.ticket_id, hits.c.rank)\
+            .join(SupportTicket, SupportTicket.id == hits.c.ticket_id)
+        if status:
+            matches = matches.where(SupportTicket.status == status)
+        if order_number:
+            matches = matches.join(Order, Order.id == SupportTicket.order_id)\
+                .where(Order.order_number == order_number)
+        if start:
+            matches = matches.where(SupportTicket.created_at >= start)
+        if end:
+            matches = matches.where(SupportTicket.created_at < end)
+
+        # The total rides along with the page so matches are ranked once
+        rows = db.session.execute(
+            matches.add_columns(db.func.count().over().label('total'))
+            .order_by(hits.c.rank, SupportTicket.id.desc())
+            .limit(limit).offset((page - 1) * limit)
+        ).all()
+        ticket_ids = [row.ticket_id for row in rows]
+
+        if rows:
+            result['total'] = rows[0].total
+        elif page > 1:
+            result['total'] = db.session.execute(
+                select(db.func.count()).select_from(matches.subquery())
+            ).scalar()
+
+        if ticket_ids:
+            tickets = {
+                ticket['id']: ticket for ticket in ticket_service.serialize(
+                    SupportTicket.query.filter(SupportTicket.id.in_(ticket_ids)), summary=True
+                )
+            }
+            result['tickets'] = [tickets[i] for i in ticket_ids if i in tickets]
+        return result
+
+# Singleton instance
+ticket_search_service = TicketSearchService()
+
+@event.listens_for(db.session, 'after_flush')
+def _reindex_changed_tickets(session, flush_context):
+    ticket_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, TicketResponse):
+            ticket_ids.add(obj.ticket_id)
+        elif isinstance(obj, SupportTicket):
+            state = inspect(obj)
+            # Status changes and the like leave the indexed text alone
+            if obj in session.dirty and not any(
+                state.attrs[name].history.has_changes() for name in ('subject', 'message')
+            ):
+                continue
+            ticket_ids.add(obj.id)
+    ticket_ids.discard(None)
+    if ticket_ids:
+        ticket_search_service.index_tickets(session.connection(), ticket_ids)
+
+@click.command('reindex-tickets')
+@with_appcontext
+def reindex_tickets_command():
+    """Rebuild the support ticket full-text index"""
+    started = datetime.utcnow()
+    count = ticket_search_service.rebuild()
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    click.echo(f'Indexed {count} tickets in {elapsed:.2f}s')
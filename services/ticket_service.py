@@ -0,0 +1,88 @@
+"""
+Support ticket listing
+Serializes tickets with their threads, or with per-ticket summaries, in a
+fixed number of queries per ID_CHUNK_SIZE tickets however many responses
+there are
+"""
+
+from collections import defaultdict
+
+from models_sqlalchemy import db
+from models_sqlalchemy.models import SupportTicket, TicketResponse
+
+# Ticket ids bound per IN list; SQLite before 3.32 allows 999 parameters
+ID_CHUNK_SIZE = 500
+
+def _chunks(ids):
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        yield ids[start:start + ID_CHUNK_SIZE]
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+class TicketService:
+    """Batched loading of support tickets"""
+
+    def serialize(self, query, summary=False):
+        """
+        Tickets from a SupportTicket query as dicts
+
+        Args:
+            query: SupportTicket query (filters and ordering are kept)
+            summary: Replace each thread with response_count,
+                     last_response_at and last_activity_at
+
+        Returns:
+            list: ticket dicts, each with 'responses' unless summary
+        """
+        # One query for tickets and their order numbers
+        tickets = query.options(db.joinedload(SupportTicket.order)).all()
+        if not tickets:
+            return []
+        ticket_ids = [ticket.id for ticket in tickets]
+
+        if summary:
+            # One grouped query for every thread's size and latest reply
+            stats = {
+                ticket_id: (count, last_response_at)
+                for chunk in _chunks(ticket_ids)
+                for ticket_id, count, last_response_at in db.session.query(
+                    TicketResponse.ticket_id,
+                    db.func.count(TicketResponse.id),
+                    db.func.max(TicketResponse.created_at)
+                ).filter(TicketResponse.ticket_id.in_(chunk))
+                .group_by(TicketResponse.ticket_id)
+            }
+
+            results = []
+            for ticket in tickets:
+                count, last_response_at = stats.get(ticket.id, (0, None))
+                touched = ticket.updated_at or ticket.created_at
+                last_activity_at = max(filter(None, (touched, last_response_at)), default=None)
+
+                ticket_dict = ticket.to_dict()
+                ticket_dict['response_count'] = count
+                ticket_dict['last_response_at'] = _isoformat(last_response_at)
+                ticket_dict['last_activity_at'] = _isoformat(last_activity_at)
+                results.append(ticket_dict)
+            return results
+
+        # One query for every response with its responder; each thread
+        # falls in a single chunk, so its order holds
+        threads = defaultdict(list)
+        for chunk in _chunks(ticket_ids):
+            for response in TicketResponse.query\
+                    .options(db.joinedload(TicketResponse.responder))\
+                    .filter(TicketResponse.ticket_id.in_(chunk))\
+                    .order_by(TicketResponse.created_at, TicketResponse.id):
+                threads[response.ticket_id].append(response.to_dict())
+
+        results = []
+        for ticket in tickets:
+            ticket_dict = ticket.to_dict()
+            ticket_dict['responses'] = threads[ticket.id]
+            results.append(ticket_dict)
+        return results
+
+# Singleton instance
+ticket_service = TicketService()
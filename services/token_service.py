@@ -0,0 +1,164 @@
+"""
+JWT revocation service
+Keeps a per-process Bloom filter of revoked token ids in front of the
+revoked_tokens table, so checking a valid token needs no database query
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models_sqlalchemy import db
+from models_sqlalchemy.models import RevokedToken
+from utils.bloom import BloomFilter
+
+# INSERT ... ON CONFLICT DO NOTHING per dialect
+_INSERT_IGNORE = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+class TokenRevocationService:
+    """Revocation list with a Bloom filter and incremental sync"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._watermark = None
+        self._recent = {}
+        self._last_sync = 0
+
+    def _add(self, jti, revoked_at):
+        # Revocations inside the sync lookback are remembered so seeing
+        # them again does not count them twice towards the filter capacity
+        if jti not in self._recent:
+            self._recent[jti] = revoked_at
+            self._filter.add(jti)
+
+    def _forget_before(self, horizon):
+        self._recent = {jti: at for jti, at in self._recent.items() if at >= horizon}
+
+    def _rebuild(self):
+        started = datetime.utcnow()
+        rows = db.session.query(RevokedToken.jti, RevokedToken.revoked_at)\
+            .filter(RevokedToken.expires_at > started).all()
+
+        self._filter = BloomFilter(max(len(rows) * 2, current_app.config['TOKEN_REVOCATION_CAPACITY']))
+        self._recent = {}
+        for row in rows:
+            self._add(row.jti, row.revoked_at)
+
+        self._watermark = started
+        self._forget_before(started - timedelta(seconds=current_app.config['TOKEN_REVOCATION_LOOKBACK_SECONDS']))
+
+    def _sync(self):
+        config = current_app.config
+        now = time.monotonic()
+
+        if self._filter is None or self._filter.count >= self._filter.capacity:
+            self._rebuild()
+        elif now - self._last_sync >= config['TOKEN_REVOCATION_SYNC_SECONDS']:
+            # Pick up tokens revoked by other workers since the last sync.
+            # Commits can land out of revoked_at order, so each sync looks
+            # back TOKEN_REVOCATION_LOOKBACK_SECONDS past the last one
+            started = datetime.utcnow()
+            lookback = timedelta(seconds=config['TOKEN_REVOCATION_LOOKBACK_SECONDS'])
+            for row in db.session.query(RevokedToken.jti, RevokedToken.revoked_at)\
+                    .filter(RevokedToken.revoked_at >= self._watermark - lookback):
+                self._add(row.jti, row.revoked_at)
+            self._watermark = started
+            self._forget_before(started - lookback)
+        else:
+            return
+
+        self._last_sync = now
+
+    def is_revoked(self, jti):
+        """Check a token id; only Bloom filter hits reach the database"""
+        with self._lock:
+            self._sync()
+            maybe_revoked = jti in self._filter
+
+        if not maybe_revoked:
+            return False
+
+        return db.session.query(RevokedToken.id).filter_by(jti=jti).first() is not None
+
+    def revoke(self, *payloads):
+        """
+        Revoke decoded JWTs; tokens that are already revoked are skipped
+
+        Args:
+            payloads: Decoded token payloads (get_jwt() / decode_token())
+
+        Returns:
+            int: Number of tokens this call revoked, so 0 means another
+                 request revoked them first (e.g. a concurrent refresh)
+        """
+        revoked_at = datetime.utcnow()
+        rows = [
+            {
+                'jti': payload['jti'],
+                'token_type': payload.get('type', 'access'),
+                'user_id': payload.get('sub'),
+                'expires_at': datetime.utcfromtimestamp(payload['exp']),
+                'revoked_at': revoked_at
+            }
+            for payload in payloads
+        ]
+
+        try:
+            insert_ignore = _INSERT_IGNORE.get(db.engine.dialect.name)
+            revoked = 0
+            for row in rows:
+                if insert_ignore:
+                    revoked += db.session.execute(
+                        insert_ignore(RevokedToken).values(**row).on_conflict_do_nothing(index_elements=['jti'])
+                    ).rowcount
+                elif not db.session.query(RevokedToken.id).filter_by(jti=row['jti']).first():
+                    db.session.add(RevokedToken(**row))
+                    revoked += 1
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        with self._lock:
+            if self._filter is not None:
+                for row in rows:
+                    self._add(row['jti'], revoked_at)
+
+        return revoked
+
+    def prune_expired(self):
+        """
+        Delete revocations whose tokens have expired anyway
+
+        Returns:
+            int: Number of revocations deleted
+        """
+        try:
+            deleted = RevokedToken.query.filter(RevokedToken.expires_at <= datetime.utcnow())\
+                .delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return deleted
+
+# Singleton instance
+token_revocation_service = TokenRevocationService()
+
+@click.command('prune-revoked-tokens')
+@with_appcontext
+def prune_revoked_tokens_command():
+    """Delete revoked tokens that have expired"""
+    started = datetime.utcnow()
+    count = token_revocation_service.prune_expired()
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    click.echo(f'Pruned {count} revoked tokens in {elapsed:.2f}s')
@@ -0,0 +1,181 @@
+"""
+Per-process user identity cache
+LRU + TTL cache of user snapshots for auth checks, kept coherent across
+workers by evicting users whose updated_at moved, plus a version counter
+in number_sequences that clears every cache when a user is deleted
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event, select, text
+
+from models_sqlalchemy import db
+from models_sqlalchemy.user import User
+
+VERSION_KEY = 'user_cache'
+
+class CachedUser:
+    """Detached, read-only copy of the User columns used by auth checks"""
+
+    __slots__ = ('id', 'email', 'role', 'full_name', 'phone', 'is_active',
+                 'created_at', 'updated_at')
+
+    def __init__(self, user):
+        for name in self.__slots__:
+            setattr(self, name, getattr(user, name))
+
+    def to_dict(self):
+        return User.to_dict(self)
+
+class UserCache:
+    """LRU + TTL cache of CachedUser by id, with hit/miss counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self._watermark = None
+        self._seen = {}
+        self._last_sync = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _sync(self, config):
+        # Every few seconds, evict the users other workers changed since we
+        # last looked. Commits can land out of updated_at order, so each
+        # check looks back USER_CACHE_LOOKBACK_SECONDS and skips changes
+        # already handled
+        now = time.monotonic()
+        if now - self._last_sync < config['USER_CACHE_SYNC_SECONDS']:
+            return
+        self._last_sync = now
+        started = datetime.utcnow()
+
+        version = db.session.execute(
+            text('SELECT value FROM number_sequences WHERE name = :name'),
+            {'name': VERSION_KEY}
+        ).scalar()
+
+        if version != self._version:
+            with self._lock:
+                if self._version is not None:
+                    self.invalidations += len(self._entries)
+                self._entries.clear()
+                self._version = version
+        elif self._watermark is not None:
+            lookback = timedelta(seconds=config['USER_CACHE_LOOKBACK_SECONDS'])
+            changed = [
+                (user_id, updated_at) for user_id, updated_at in db.session.execute(
+                    select(User.id, User.updated_at).where(User.updated_at >= self._watermark - lookback)
+                ) if self._seen.get(user_id) != updated_at
+            ]
+            self.invalidate(*[user_id for user_id, _ in changed])
+            self._seen.update(changed)
+            horizon = started - lookback
+            self._seen = {user_id: at for user_id, at in self._seen.items() if at >= horizon}
+
+        self._watermark = started
+
+    def get(self, user_id):
+        """
+        Get a user snapshot by id
+
+        Returns:
+            CachedUser or None if the user does not exist
+        """
+        config = current_app.config
+
+        if not config['USER_CACHE_SIZE']:
+            user = db.session.get(User, user_id)
+            return CachedUser(user) if user else None
+
+        self._sync(config)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+
+        cached = CachedUser(user)
+        with self._lock:
+            self._entries[user_id] = (cached, now + config['USER_CACHE_TTL_SECONDS'])
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > config['USER_CACHE_SIZE']:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return cached
+
+    def invalidate(self, *user_ids):
+        """Drop users from this process's cache"""
+        with self._lock:
+            for user_id in user_ids:
+                if self._entries.pop(user_id, None) is not None:
+                    self.invalidations += 1
+
+    def stats(self):
+        """Counters for instrumentation"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+# Singleton instance
+user_cache = UserCache()
+
+@event.listens_for(db.session, 'after_flush')
+def _note_user_changes(session, flush_context):
+    changed = [
+        obj.id for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, User) and obj.id is not None
+    ]
+    if not changed:
+        return
+
+    session.info.setdefault('user_cache_evict', set()).update(changed)
+
+    # Other workers see updates through users.updated_at; a deleted row
+    # leaves nothing to poll, so deletes bump the version instead. Same
+    # transaction as the change, so no worker sees one without the other
+    if not any(isinstance(obj, User) for obj in session.deleted):
+        return
+    conn = session.connection()
+    updated = conn.execute(
+        text('UPDATE number_sequences SET value = value + 1 WHERE name = :name'),
+        {'name': VERSION_KEY}
+    ).rowcount
+    if not updated:
+        conn.execute(
+            text('INSERT INTO number_sequences (name, value) VALUES (:name, 1)'),
+            {'name': VERSION_KEY}
+        )
+
+@event.listens_for(db.session, 'after_commit')
+def _evict_committed_users(session):
+    evict = session.info.pop('user_cache_evict', None)
+    if evict:
+        user_cache.invalidate(*evict)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_pending_evictions(session):
+    session.info.pop('user_cache_evict', None)
@@ -0,0 +1,55 @@
+"""
+Shared fixtures: an app on a throwaway SQLite database with one customer,
+one provider and an authenticated test client
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from config import Config
+from models_sqlalchemy import db
+from models_sqlalchemy.user import User
+from models_sqlalchemy.models import ProviderProfile
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+        SQLALCHEMY_REPLICA_URIS = []
+        UPLOAD_FOLDER = str(tmp_path / 'uploads')
+        RATE_LIMIT_ENABLED = False
+        PASSWORD_HASH_WORKERS = 0
+        CATALOGUE_FACET_CACHE_SECONDS = 0
+        CATALOGUE_REFRESH_SECONDS = 0
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+@pytest.fixture
+def users(app):
+    customer = User(email='customer@example.com', role='customer', full_name='Customer', password_hash='x')
+    provider = User(email='provider@example.com', role='provider', full_name='Provider', password_hash='x')
+    db.session.add_all([customer, provider])
+    db.session.flush()
+    db.session.add(ProviderProfile(user_id=provider.id, business_name='Solar Co', is_approved=True))
+    db.session.commit()
+    return {'customer': customer.id, 'provider': provider.id}
+
+@pytest.fixture
+def client(app, users):
+    token = create_access_token(identity=users['customer'])
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return client
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+
+from models_sqlalchemy import db
+from services.analytics_service import bucket_expression
+
+def test_sqlite_weeks_are_iso_weeks(app):
+    # Around year ends, where ISO weeks and Monday-based %W weeks differ
+    days = [datetime(year, 12, 20) + timedelta(days=offset)
+            for year in (2019, 2020, 2025, 2026) for offset in range(20)]
+    for day in days:
+        label = db.session.query(bucket_expression(db.literal(day), 'week', 'sqlite')).scalar()
+        year, week, _ = day.isocalendar()
+        assert label == f'{year}-W{week:02d}', day
+
+def test_mixed_offset_dates_are_compared_in_utc(app, users):
+    from flask_jwt_extended import create_access_token
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {create_access_token(identity=users['provider'])}"
+
+    response = client.get('/api/provider/analytics/sales'
+                          '?start_date=2026-01-01T00:00:00%2B03:00&end_date=2026-01-31')
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['analytics']['period']['start'] == '2025-12-31T21:00:00'
+
+    response = client.get('/api/provider/analytics/sales'
+                          '?start_date=2026-01-01&end_date=2026-01-01T02:00:00%2B03:00')
+    assert response.status_code == 400
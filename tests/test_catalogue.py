@@ -0,0 +1,119 @@
+"""Storefront browse: filters and facet counts"""
+from urllib.parse import urlencode
+
+import pytest
+
+from models_sqlalchemy import db
+from models_sqlalchemy.models import Product
+
+# Facet name -> browse query parameter that filters on its values
+FACET_PARAMS = {
+    'price': 'price_band',
+    'wattage': 'wattage_band',
+    'panel_type': 'panel_type',
+    'provider': 'provider_id',
+    'in_stock': 'in_stock'
+}
+
+@pytest.fixture
+def catalogue(users):
+    specs = [
+        ('Solar Lantern', 450, 5, 'Monocrystalline', 10),
+        ('Camping Lamp', 1200, 15, 'Polycrystalline', 0),
+        ('Home Kit', 3500, 60, 'Monocrystalline', 5),
+        ('Floodlight', 18500, 200, None, 2),
+        ('Torch', 800, None, None, 0),
+        ('Radio Lamp', 2800, 10, None, 7),
+        ('Street Light', 25000, None, '', 1),
+        ('Desk Lamp', 950, 5, '', 3),
+        ('Garden Light', 1500, 25, '', 0)
+    ]
+    db.session.add_all([
+        Product(provider_id=users['provider'], name=name, description='Solar light', price=price,
+                wattage=wattage, solar_panel_type=panel_type, stock_quantity=stock,
+                is_active=True, is_approved=True)
+        for name, price, wattage, panel_type, stock in specs
+    ])
+    db.session.commit()
+    return len(specs)
+
+def browse(client, query=''):
+    response = client.get(f'/api/customer/products?{query}')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+def test_unknown_panel_types_share_one_facet(client, catalogue):
+    panel_types = {item['value']: item['count'] for item in browse(client)['facets']['panel_type']}
+    assert panel_types == {'unknown': 6, 'Monocrystalline': 2, 'Polycrystalline': 1}
+
+def test_every_facet_value_filters_to_its_count(client, catalogue):
+    facets = browse(client)['facets']
+    for facet, param in FACET_PARAMS.items():
+        assert sum(item['count'] for item in facets[facet]) == catalogue
+        for item in facets[facet]:
+            body = browse(client, urlencode({param: item['value']}))
+            assert body['total'] == item['count'], (facet, item)
+
+def test_unknown_band_is_rejected(client, catalogue):
+    response = client.get('/api/customer/products?price_band=unknown')
+    assert response.status_code == 400
+
+PARITY_QUERIES = [
+    '',
+    'facets=false',
+    'sort=price_asc',
+    'sort=price_desc&limit=4',
+    'sort=newest&limit=3',
+    'sort=wattage&limit=4',
+    'sort=popularity',
+    'search=lamp',
+    'search=LIGHT&sort=price_asc',
+    'min_price=900&max_price=3000',
+    'min_wattage=10&sort=wattage',
+    'panel_type=unknown&sort=price_asc',
+    'panel_type=Monocrystalline,unknown&in_stock=true',
+    'price_band=1000-2500,20000%2B',
+    'wattage_band=unknown,0-10',
+    'in_stock=false&sort=price_desc'
+]
+
+def test_engines_agree(app, client, catalogue):
+    from services.catalogue_service import catalogue_engine
+    catalogue_engine._snapshot = None
+
+    def pages(engine, query):
+        app.config['CATALOGUE_ENGINE'] = engine
+        body = browse(client, query)
+        results = [body]
+        # Walk the remaining pages of a paged query
+        while body.get('next_cursor'):
+            body = browse(client, f"{query}&cursor={body['next_cursor']}")
+            results.append(body)
+        return results
+
+    for query in PARITY_QUERIES:
+        sql, memory = pages('sql', query), pages('memory', query)
+        assert len(sql) == len(memory), query
+        for sql_page, memory_page in zip(sql, memory):
+            if 'sort=' not in query:
+                # Unsorted results come in no particular order
+                for page in (sql_page, memory_page):
+                    page['products'].sort(key=lambda product: product['id'])
+            for key in ('products', 'total', 'next_cursor', 'facets'):
+                assert sql_page.get(key) == memory_page.get(key), (query, key)
+        # Every page reports the full match count
+        matches = sum(len(page['products']) for page in sql)
+        assert all(page['total'] == matches for page in sql + memory), query
+
+def test_search_matches_literally(app, client, catalogue, users):
+    from services.catalogue_service import catalogue_engine
+    catalogue_engine._snapshot = None
+    db.session.add(Product(provider_id=users['provider'], name='Kit_100% \\ Pro', price=999,
+                           stock_quantity=1, is_active=True, is_approved=True))
+    db.session.commit()
+
+    for engine in ('sql', 'memory'):
+        app.config['CATALOGUE_ENGINE'] = engine
+        for term in ('_', '%', '\\', '0%'):
+            body = browse(client, urlencode({'search': term, 'facets': 'false'}))
+            assert [p['name'] for p in body['products']] == ['Kit_100% \\ Pro'], (engine, term)
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from models_sqlalchemy import db
+from models_sqlalchemy.models import Order, Product
+from services.order_service import order_service
+
+RESULT = {
+    'result_code': 0, 'result_desc': 'OK', 'amount': 100.0, 'receipt_number': 'R1',
+    'transaction_date': datetime(2026, 1, 1), 'phone_number': '254700000000'
+}
+
+def pending_order(users):
+    product = Product(provider_id=users['provider'], name='Panel', price=100.0,
+                      stock_quantity=5, is_active=True, is_approved=True)
+    db.session.add(product)
+    db.session.commit()
+    cart = {'total': 100.0, 'items': [{'product_id': product.id, 'quantity': 1, 'price': 100.0}]}
+    return order_service.create_order(users['customer'], cart, {
+        'order_number': 'ORD-1', 'payment_method': 'mpesa',
+        'payment_status': 'pending', 'order_status': 'pending'
+    })
+
+def test_early_callback_is_applied_on_attach(app, users):
+    order = pending_order(users)
+    order_service.record_unmatched_payment('ws_1', 'm_1', RESULT)
+
+    order = order_service.attach_payment_request(order, 'ws_1', 'm_1')
+    assert order.payment_status == 'completed'
+    assert order.mpesa_receipt_number == 'R1'
+
+def test_callback_racing_attach_is_applied(app, users):
+    # The callback found no order, then checkout committed the checkout id
+    # and looked for early payments before the callback committed its own
+    order = pending_order(users)
+    order_service.attach_payment_request(order, 'ws_1', 'm_1')
+
+    payment = order_service.record_unmatched_payment('ws_1', 'm_1', RESULT)
+    assert payment.order_id == order.id
+    assert db.session.get(Order, order.id).payment_status == 'completed'
@@ -4,10 +4,16 @@ from .validators import (
     validate_phone_number,
     validate_role
 )
+from .bloom import BloomFilter
+from .specs import parse_battery_wh, parse_hours, parse_panel_efficiency
 
 __all__ = [
     'validate_email',
     'validate_password',
     'validate_phone_number',
-    'validate_role'
+    'validate_role',
+    'BloomFilter',
+    'parse_battery_wh',
+    'parse_hours',
+    'parse_panel_efficiency'
 ]
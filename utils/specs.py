@@ -0,0 +1,58 @@
+import re
+
+# Nominal cell voltages used to turn charge ratings into energy
+LITHIUM_CELL_VOLTS = 3.7
+LEAD_ACID_VOLTS = 12.0
+
+# Typical module efficiency by panel technology
+PANEL_EFFICIENCY = {
+    'monocrystalline': 0.20,
+    'polycrystalline': 0.16,
+    'amorphous': 0.10,
+    'thin film': 0.10
+}
+
+_NUMBER = r'(\d+(?:[.,]\d+)?)'
+_ENERGY = re.compile(_NUMBER + r'\s*(kwh|wh|mah|ah)\b', re.IGNORECASE)
+_HOURS = re.compile(_NUMBER + r'(?:\s*(?:-|to)\s*' + _NUMBER + r')?\s*\+?\s*(?:h|hr|hrs|hours?)\b',
+                    re.IGNORECASE)
+
+def _number(text):
+    return float(text.replace(',', '.'))
+
+def parse_battery_wh(value):
+    """Battery energy in Wh from strings like '15000mAh', '100Ah', '512Wh'"""
+    if not value:
+        return None
+    match = _ENERGY.search(str(value))
+    if not match:
+        return None
+
+    amount, unit = _number(match.group(1)), match.group(2).lower()
+    if unit == 'kwh':
+        return amount * 1000
+    if unit == 'wh':
+        return amount
+    if unit == 'mah':
+        return round(amount / 1000 * LITHIUM_CELL_VOLTS, 2)
+    return amount * LEAD_ACID_VOLTS
+
+def parse_hours(value):
+    """Guaranteed runtime in hours from '8 hours', '6-8 hours', '24+ hours'"""
+    if not value:
+        return None
+    match = _HOURS.search(str(value))
+    if not match:
+        return None
+    # Ranges are quoted best case last, so size against the low end
+    return _number(match.group(1))
+
+def parse_panel_efficiency(value):
+    """Typical efficiency for a panel type string, e.g. 'Monocrystalline'"""
+    if not value:
+        return None
+    text = str(value).lower()
+    for name, efficiency in PANEL_EFFICIENCY.items():
+        if name in text:
+            return efficiency
+    return None